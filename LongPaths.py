@@ -1,23 +1,143 @@
 import os
+import sys
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-contador = 0
-f = open ("log_LongPaths.txt", "w")
-linea = "[000]" + "\t" + "Ficheros con ruta mayor o igual a 240 caracteres: (1 unidad)+(2 :\\) + 256 + (1 null) = 260 caracteres\n"
-print(linea)
-f.write(linea)
-
-for top, dirs, files in os.walk('C:\\'):
-    for nm in files:
-        ruta= os.path.join(top, nm)
-        lenruta= len(ruta)
-        linea = "["+ str(lenruta) + "]" + "\t" + ruta + "\n"
-        if lenruta >=240:
-            contador = contador +1
-            print(linea)
-            f.write(linea)
-            linea = "[ddd]" + "\t" + "Ficheros con ruta mayor de 250 caracteres - 1 + 2 + 256 + 1 = 260\n"
-
-linea = "[" + str(contador) +"]" + "\t" + "Ficheros con ruta mayor de 250 caracteres: (1 unidad)+(2 :\\) + 256 + (1 null) = 260 caracteres\n"
-print(linea)
-f.write(linea)
-f.close()
\ No newline at end of file
+# Busca ficheros cuya ruta completa alcanza el limite de Windows (MAX_PATH = 260:
+# unidad + ":\" + 256 + null). Se recorre cada raiz con os.scandir, repartiendo
+# los subdirectorios de primer nivel entre varios hilos (scandir suelta el GIL
+# mientras espera al disco o a la red), y solo se formatean las rutas que
+# superan el umbral. Al final se muestra un histograma de longitudes.
+#
+# Uso:
+#   python LongPaths.py                          (C:\ en Windows, / en el resto)
+#   python LongPaths.py D:\ \\servidor\compartido -t 200 -w 32 -o log_LongPaths.txt
+
+UMBRAL = 240
+ANCHO_HISTOGRAMA = 20
+RAIZ_POR_DEFECTO = 'C:\\' if os.name == 'nt' else '/'
+
+
+def recorrer(top, umbral, histograma):
+    # Recorre 'top' con os.scandir sin seguir enlaces simbolicos (como os.walk).
+    # Cuenta cada fichero en el histograma y devuelve solo las rutas largas
+    # como tuplas (longitud, ruta)
+    largas = []
+    pendientes = [top]
+    while pendientes:
+        directorio = pendientes.pop()
+        try:
+            with os.scandir(directorio) as entradas:
+                for entrada in entradas:
+                    try:
+                        es_directorio = entrada.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if es_directorio:
+                        pendientes.append(entrada.path)
+                        continue
+                    longitud = len(entrada.path)
+                    histograma[longitud // ANCHO_HISTOGRAMA] += 1
+                    if longitud >= umbral:
+                        largas.append((longitud, entrada.path))
+        except OSError:
+            # Sin permisos o directorio desaparecido: se ignora igual que hace os.walk
+            continue
+    return largas
+
+
+def _recorrer_subarbol(top, umbral):
+    # Tarea de un hilo: cada subarbol lleva su propio histograma para no compartir estado
+    histograma = Counter()
+    largas = recorrer(top, umbral, histograma)
+    return largas, histograma
+
+
+def escanear(raices, umbral=UMBRAL, hilos=8, histograma=None):
+    # Generador de listas de rutas largas, una por subarbol y ordenada, en cuanto
+    # termina cada subarbol. Si se pasa 'histograma' (Counter) se acumulan en el
+    # los ficheros por tramo de longitud
+    if histograma is None:
+        histograma = Counter()
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        tareas = []
+        for raiz in raices:
+            # Los ficheros de la raiz se tratan aqui; cada subdirectorio es una tarea
+            largas = []
+            try:
+                with os.scandir(raiz) as entradas:
+                    for entrada in entradas:
+                        try:
+                            if entrada.is_dir(follow_symlinks=False):
+                                tareas.append(pool.submit(_recorrer_subarbol, entrada.path, umbral))
+                                continue
+                        except OSError:
+                            continue
+                        longitud = len(entrada.path)
+                        histograma[longitud // ANCHO_HISTOGRAMA] += 1
+                        if longitud >= umbral:
+                            largas.append((longitud, entrada.path))
+            except OSError as e:
+                print('No se puede leer {}: {}'.format(raiz, e), file=sys.stderr)
+            if largas:
+                yield sorted(largas, key=lambda item: item[1])
+        for tarea in as_completed(tareas):
+            largas, parcial = tarea.result()
+            histograma.update(parcial)
+            if largas:
+                yield sorted(largas, key=lambda item: item[1])
+
+
+def formatear_histograma(histograma, umbral, ancho_barra=50):
+    # Histograma de longitudes por tramos de ANCHO_HISTOGRAMA caracteres
+    total = sum(histograma.values())
+    lineas = ['Histograma de longitudes de ruta ({} ficheros):'.format(total)]
+    if not total:
+        return lineas
+    maximo = max(histograma.values())
+    for tramo in range(min(histograma), max(histograma) + 1):
+        cuenta = histograma.get(tramo, 0)
+        desde = tramo * ANCHO_HISTOGRAMA
+        marca = ' <' if desde + ANCHO_HISTOGRAMA > umbral else ''
+        lineas.append('{:>4}-{:<4} {:>10} {}{}'.format(
+            desde, desde + ANCHO_HISTOGRAMA - 1, cuenta, '#' * max(1 if cuenta else 0, cuenta * ancho_barra // maximo), marca))
+    return lineas
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Localiza ficheros con rutas demasiado largas para Windows.')
+    parser.add_argument('raices', nargs='*', default=[RAIZ_POR_DEFECTO],
+                        help='Directorios a revisar (por defecto: %(default)s)')
+    parser.add_argument('-t', '--umbral', type=int, default=UMBRAL,
+                        help='Longitud minima a registrar (por defecto: %(default)s)')
+    parser.add_argument('-w', '--hilos', type=int, default=min(32, (os.cpu_count() or 1) * 4),
+                        help='Hilos que recorren los subdirectorios de primer nivel (por defecto: %(default)s)')
+    parser.add_argument('-o', '--log', default='log_LongPaths.txt', help='Fichero de resultados (por defecto: %(default)s)')
+    parser.add_argument('-q', '--silencioso', action='store_true', help='No muestra cada ruta larga por pantalla')
+    args = parser.parse_args()
+
+    contador = 0
+    histograma = Counter()
+    # Cabecera de la primera y la ultima linea del log; solo cambia el contador entre corchetes
+    cabecera = ("Ficheros con ruta mayor o igual a {} caracteres: "
+                "(1 unidad)+(2 :\\) + 256 + (1 null) = 260 caracteres\n").format(args.umbral)
+    with open(args.log, 'w', encoding='utf-8') as f:
+        linea = "[000]" + "\t" + cabecera
+        print(linea)
+        f.write(linea)
+
+        for largas in escanear(args.raices, args.umbral, max(1, args.hilos), histograma):
+            bloque = ''.join('[{}]\t{}\n'.format(longitud, ruta) for longitud, ruta in largas)
+            contador += len(largas)
+            if not args.silencioso:
+                print(bloque, end='')
+            f.write(bloque)
+
+        linea = "[" + str(contador) + "]" + "\t" + cabecera
+        print(linea)
+        f.write(linea)
+
+        resumen = formatear_histograma(histograma, args.umbral)
+        print('\n'.join(resumen))
+        f.write('\n'.join(resumen) + '\n')
@@ -2,6 +2,36 @@ import os
 import hashlib
 from collections import defaultdict
 
+def iter_files(directory):
+    """
+    Recorre un directorio y sus subdirectorios con os.scandir.
+
+    Solo devuelve archivos regulares: los enlaces simbólicos se ignoran (así no
+    hay bucles) y los FIFOs, sockets y dispositivos se saltan porque leerlos
+    puede bloquear el script. El tipo de cada entrada se obtiene de la propia
+    lectura del directorio, sin una llamada extra al sistema por archivo.
+
+    Args:
+        directory (str): El directorio a recorrer.
+
+    Yields:
+        str: La ruta de cada archivo regular encontrado.
+    """
+    stack = [directory]
+    while stack:
+        dirpath = stack.pop()
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    if entry.is_symlink():
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path
+        except OSError as e:
+            print(f"Advertencia: No se pudo leer el directorio '{dirpath}': {e}")
+
 def find_duplicate_files(directory):
     """
     Busca archivos duplicados en un directorio y sus subdirectorios.
@@ -20,18 +50,16 @@ def find_duplicate_files(directory):
     file_hashes = defaultdict(list)
     print("Buscando archivos duplicados. Esto puede tardar un poco...")
     
-    for dirpath, _, filenames in os.walk(directory):
-        for filename in filenames:
-            file_path = os.path.join(dirpath, filename)
-            try:
-                # Calculamos el hash SHA-256 del archivo
-                with open(file_path, 'rb') as f:
-                    file_hash = hashlib.sha256(f.read()).hexdigest()
-                file_hashes[file_hash].append(file_path)
-            except (IOError, PermissionError) as e:
-                # Ignoramos archivos que no podemos leer
-                print(f"Advertencia: No se pudo leer el archivo '{file_path}': {e}")
-                continue
+    for file_path in iter_files(directory):
+        try:
+            # Calculamos el hash SHA-256 del archivo
+            with open(file_path, 'rb') as f:
+                file_hash = hashlib.sha256(f.read()).hexdigest()
+            file_hashes[file_hash].append(file_path)
+        except (IOError, PermissionError) as e:
+            # Ignoramos archivos que no podemos leer
+            print(f"Advertencia: No se pudo leer el archivo '{file_path}': {e}")
+            continue
 
     return {hash_val: paths for hash_val, paths in file_hashes.items() if len(paths) > 1}
 
@@ -26,17 +26,71 @@ Versiones:
                           grandes usando 64ks de búfer sin consumir RAM
                       Optimización SWBOK para  poda de directorio, evitando
                           descender en subdirectorios en exclusión.
+  3.1.0 - 18/10/2026: Detección por etapas: agrupación por tamaño, hash
+                          parcial del inicio y final del archivo y hash
+                          completo solo de los candidatos que coinciden.
+                      Caché persistente de hashes en SQLite (--cache) con
+                          clave (dispositivo, inodo, tamaño, mtime).
+                      Cálculo de hashes en paralelo con un pool acotado de
+                          hilos (--workers).
+                      Exclusiones precompiladas en un conjunto de prefijos
+                          y una expresión regular de patrones glob, sin
+                          resolve() por archivo (--benchmark para medirlo).
+                      Recorrido propio con os.scandir que reutiliza los
+                          datos de DirEntry, evita bucles de enlaces
+                          simbólicos y salta FIFOs, sockets y dispositivos.
+                      Algoritmo de hash seleccionable (--hash), verificación
+                          opcional de coincidencias (--verify) y tamaño de
+                          búfer configurable (--buffer-size).
+                      Lectura sin copias con readinto() sobre un búfer
+                          reutilizable por hilo, mmap para archivos grandes
+                          y posix_fadvise para no vaciar la caché de páginas.
+                      Informe incremental en texto, JSONL o CSV (--format):
+                          cada grupo se escribe en cuanto se confirma, con
+                          su tamaño y los bytes desperdiciados.
+                      Puntos de control del recorrido y de los hashes en
+                          SQLite (--checkpoint) y reanudación (--resume).
+                      Acciones sobre los duplicados (--action): enlace
+                          duro, reflink, cuarentena o borrado, con simulación
+                          (--dry-run), política de conservación (--keep,
+                          --prefer) y resumen de bytes recuperados.
 """
 
 import hashlib
 import argparse
+import csv
+import filecmp
+import fnmatch
+import glob
+import json
+import mmap
+import os
+import re
+import secrets
+import shutil
+import sqlite3
 import sys
-from collections import defaultdict
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from typing import NamedTuple
 from loguru import logger
 from tqdm import tqdm
 
+# Algoritmos de hash opcionales: solo se ofrecen si la librería está instalada
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 # Desactivar el manejador por defecto de loguru para usar uno personalizado
 logger.remove()
 # Configurar la salida de loguru con colores para la consola
@@ -48,9 +102,31 @@ logger.add(
 )
 
 # Constantes para la versión y el manpage
-VERSION = "3.0.0"
+VERSION = "3.1.0"
 # Tamaño del bloque para el cálculo del hash
 BUFFER_SIZE = 65536  # 64KB
+# Bytes leídos del inicio y del final de cada archivo para el hash parcial
+PARTIAL_HASH_SIZE = 16384  # 16KB
+# A partir de este tamaño el archivo se proyecta en memoria con mmap
+MMAP_THRESHOLD = 64 * 1024 * 1024  # 64MB
+# Algoritmo de hash por defecto
+DEFAULT_HASH = "sha256"
+
+# Búfer de lectura reutilizable por hilo para evitar una asignación por bloque
+_thread_buffers = threading.local()
+
+# Algoritmos de hash disponibles: nombre -> constructor del objeto hash
+HASH_ALGORITHMS = {
+    "sha256": hashlib.sha256,
+    "blake2b": hashlib.blake2b,
+    "blake2s": hashlib.blake2s,
+    "md5": hashlib.md5,
+}
+if blake3:
+    HASH_ALGORITHMS["blake3"] = blake3.blake3
+if xxhash:
+    HASH_ALGORITHMS["xxh3"] = xxhash.xxh3_128
+    HASH_ALGORITHMS["xxh64"] = xxhash.xxh64
 
 # La cabecera del manpage
 MANPAGE = f"""
@@ -66,6 +142,11 @@ DESCRIPCIÓN
     detección se realiza calculando el hash criptográfico (SHA-256) de cada archivo
     y agrupando aquellos con el mismo hash.
 
+    Para minimizar la lectura de disco la detección se hace por etapas: primero
+    se agrupan los archivos por tamaño (un tamaño único no puede tener
+    duplicados), después se calcula un hash parcial del inicio y final de los
+    candidatos y solo los que siguen coincidiendo se leen completos.
+
     El script está optimizado para evitar el escaneo de directorios del sistema
     o cualquier otra ruta especificada en un archivo de exclusión. Utiliza un
     algoritmo de una sola pasada para mayor eficiencia y procesa los archivos
@@ -87,11 +168,119 @@ OPCIONES
         directorios a excluir del escaneo. Cada directorio debe estar en una
         línea separada. Si este parámetro no se usa, el script utilizará una
         lista de directorios del sistema por defecto.
+        Las líneas vacías y las que empiezan por '#' se ignoran. Las líneas sin
+        separador de ruta se comparan solo con el nombre del archivo o
+        directorio, en cualquier nivel del árbol (por ejemplo '*.tmp' o
+        'node_modules'). Las que lo tienen se comparan con la ruta completa:
+        como patrón glob si llevan comodines (*, ?, [...]) y, si no, como ruta
+        de directorio. Las rutas y patrones relativos ('build/*.o') se toman
+        desde el directorio escaneado (-d); los absolutos, tal cual.
 
     -o, --output-file <fichero>
         Especifica el nombre del archivo de salida donde se guardarán los
         resultados. Si no se proporciona, el valor por defecto es 'duplicados.txt'.
 
+    -l, --follow-symlinks
+        Sigue los enlaces simbólicos a archivos y directorios. Por defecto se
+        ignoran. Los directorios ya visitados se detectan por (dispositivo,
+        inodo), por lo que los bucles de enlaces no provocan recorridos
+        infinitos. Los archivos especiales (FIFOs, sockets, dispositivos) se
+        saltan siempre, ya que leerlos puede bloquear el escaneo.
+
+    -w, --workers <n>
+        Número de hilos que calculan hashes en paralelo mientras el hilo
+        principal alimenta la cola de archivos. hashlib libera el GIL con
+        bloques grandes, por lo que el rendimiento escala con los núcleos hasta
+        saturar el disco. Por defecto: 1 (cálculo secuencial).
+
+    --benchmark
+        Mide el coste de las exclusiones con listas de distinto tamaño,
+        comparando el método anterior (resolve() + is_relative_to() por
+        entrada) con el comparador precompilado, y el rendimiento del cálculo
+        de hashes con el bucle f.read() anterior frente a readinto()/mmap
+        para archivos de distintos tamaños, y sale.
+
+    -H, --hash <algoritmo>
+        Algoritmo de hash para detectar duplicados: sha256 (por defecto),
+        blake2b, blake2s, md5 y, si están instaladas las librerías 'blake3' y
+        'xxhash', blake3, xxh3 y xxh64. Los algoritmos no criptográficos son
+        mucho más rápidos y adecuados para almacenamiento de confianza. El
+        algoritmo usado se indica en cada grupo del fichero de salida.
+
+    -V, --verify <modo>
+        Confirma cada grupo de duplicados antes de informarlo: 'sha256'
+        recalcula el SHA-256 de los archivos del grupo y 'bytes' los compara
+        byte a byte. Útil junto con un --hash rápido.
+
+    -b, --buffer-size <KB>
+        Tamaño en KB del búfer de lectura para el cálculo de hashes.
+        Por defecto: 64. El búfer se reserva una vez por hilo y se rellena con
+        readinto(); los archivos de más de 64MB se leen con mmap. En sistemas
+        POSIX se usa posix_fadvise (SEQUENTIAL al leer y DONTNEED al terminar)
+        para no desalojar de la caché de páginas los datos de otros servicios.
+
+    -f, --format <formato>
+        Formato del fichero de salida: 'text' (por defecto), 'jsonl' (un objeto
+        JSON por grupo con hash, algoritmo, tamaño, número de archivos, bytes
+        desperdiciados y rutas) o 'csv' (una fila por archivo duplicado con los
+        mismos campos). Si --verify separa un grupo con el mismo hash, cada
+        parte se informa con el hash real y un número de subgrupo (campo
+        'subgroup', 0 cuando el grupo no se ha separado). En todos los formatos cada grupo se escribe en disco en
+        cuanto se confirma, de modo que la memoria no crece con el número de
+        duplicados y un fallo a mitad del escaneo no pierde lo ya encontrado.
+        Las rutas que son enlaces duros de un mismo archivo (mismo dispositivo
+        e inodo) se listan junto a él, pero se cuentan como un solo archivo y
+        no suman bytes desperdiciados; tampoco se vuelve a calcular su hash.
+
+    -a, --action <acción>
+        Acción a aplicar a cada grupo en cuanto se confirma, sin una segunda
+        pasada sobre los datos. En cada grupo se conserva un archivo original
+        y el resto se sustituye:
+            report      Solo genera el informe (por defecto).
+            hardlink    Sustituye los duplicados por enlaces duros al original.
+            reflink     Sustituye los duplicados por copias con copy-on-write
+                        (FICLONE, en Btrfs/XFS sobre Linux).
+            quarantine  Mueve los duplicados a --quarantine-dir conservando
+                        su ruta.
+            delete      Borra los duplicados.
+        Con algoritmos no criptográficos (md5, xxh3, xxh64) las acciones que
+        modifican archivos activan '--verify bytes' si no se indicó otra.
+
+    -n, --dry-run
+        Muestra las acciones que se harían y los bytes que se recuperarían,
+        sin modificar ningún archivo.
+
+    --keep <política>
+        Archivo que se conserva en cada grupo: 'oldest' (fecha de modificación
+        más antigua, por defecto), 'newest' o 'shortest' (ruta más corta).
+
+    --prefer <directorio>
+        Directorio cuyos archivos se conservan con preferencia sobre la
+        política de --keep. Se puede indicar varias veces.
+
+    -q, --quarantine-dir <directorio>
+        Directorio de cuarentena para '--action quarantine'.
+
+    -k, --checkpoint <fichero>
+        Base de datos SQLite donde se guarda periódicamente el progreso: los
+        archivos ya recorridos, los directorios pendientes (ya podados de
+        exclusiones) y los hashes calculados. Si no se indica --cache, los
+        hashes se guardan en este mismo fichero.
+
+    -r, --resume
+        Reanuda un escaneo interrumpido desde el último punto de control de
+        --checkpoint: no se vuelven a recorrer los subárboles completados ni a
+        calcular los hashes ya guardados. El informe se regenera completo. Si
+        el directorio, --follow-symlinks o la lista de exclusiones no coinciden
+        con los del escaneo guardado, se empieza desde el principio.
+
+    -c, --cache <fichero>
+        Ruta a una base de datos SQLite donde se guardan los hashes calculados
+        junto con el dispositivo, inodo, tamaño y fecha de modificación de cada
+        archivo. En ejecuciones posteriores se reutilizan los hashes de los
+        archivos que no han cambiado y se eliminan las entradas de archivos
+        que ya no existen en el directorio escaneado.
+
 EJEMPLOS
     1. Escanea el directorio actual y guarda los resultados por defecto:
         python find_duplicate_files_by_hash.py
@@ -104,6 +293,25 @@ EJEMPLOS
         línea y 'C:\\Users\\tu_usuario\\AppData' en otra. Luego ejecuta:
         python find_duplicate_files_by_hash.py -d "C:\\" -e "exclude.txt"
 
+    4. Escaneo nocturno reutilizando los hashes de la ejecución anterior:
+        python find_duplicate_files_by_hash.py -d "D:\\Compartido" -c "hashes.db"
+
+    5. Escaneo de un disco NVMe usando 8 hilos de cálculo:
+        python find_duplicate_files_by_hash.py -d "E:\\" -w 8
+
+    6. Detección rápida con xxh3 y confirmación byte a byte de los duplicados:
+        python find_duplicate_files_by_hash.py -d "E:\\" -H xxh3 -V bytes -b 1024
+
+    7. Informe en JSONL para procesarlo con otras herramientas:
+        python find_duplicate_files_by_hash.py -d "E:\\" -f jsonl -o "duplicados.jsonl"
+
+    8. Escaneo largo con puntos de control, y reanudación tras un reinicio:
+        python find_duplicate_files_by_hash.py -d "C:\\" -k "escaneo.db"
+        python find_duplicate_files_by_hash.py -d "C:\\" -k "escaneo.db" -r
+
+    9. Simula sustituir duplicados por enlaces duros conservando los de 'D:\\Fotos':
+        python find_duplicate_files_by_hash.py -d "D:\\" -a hardlink --prefer "D:\\Fotos" -n
+
 AUTHOR
     Rafael Ausejo Prieto
     Fecha de Creación: 31 de agosto de 2025
@@ -126,15 +334,24 @@ DEFAULT_EXCLUDE_DIRS = [
 ]
 
 
-def load_exclude_list(file_path: Path) -> list[Path]:
+class FileStat(NamedTuple):
+    """Metadatos de un archivo que se conservan desde el recorrido hasta el hash."""
+
+    st_size: int
+    st_dev: int
+    st_ino: int
+    st_mtime_ns: int
+
+
+def load_exclude_list(file_path: Path) -> list[Path | str]:
     """
-    Lee las rutas de directorios a excluir desde un archivo de texto.
+    Lee las rutas de directorios y patrones glob a excluir desde un archivo de texto.
 
     Args:
         file_path (Path): Ruta al archivo de texto.
 
     Returns:
-        list[Path]: Una lista de rutas de directorios.
+        list[Path | str]: Una lista de rutas de directorios y patrones glob.
     """
     if file_path and not file_path.is_file():
         logger.warning(f"Advertencia: El archivo de exclusión '{file_path}' no se encontró. Usando la lista por defecto.")
@@ -147,74 +364,1217 @@ def load_exclude_list(file_path: Path) -> list[Path]:
     logger.info(f"Cargando la lista de exclusión desde '{file_path}'...")
     try:
         with file_path.open('r', encoding='utf-8') as f:
-            # Normaliza las rutas y las convierte a objetos Path
-            return [Path(line.strip()).resolve() for line in f if line.strip()]
+            # Se ignoran líneas vacías y comentarios; la normalización la hace ExclusionMatcher
+            return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
     except Exception as e:
         logger.error(f"Error al leer el archivo de exclusión: {e}. Usando la lista por defecto.")
         return DEFAULT_EXCLUDE_DIRS
 
 
-def calculate_hash(file_path: Path) -> str | None:
+class ExclusionMatcher:
+    """
+    Comparador de exclusiones compilado una sola vez.
+
+    Las rutas literales se resuelven al construir el comparador y se guardan
+    normalizadas en un conjunto, y los nombres sueltos y patrones glob se unen
+    en una única expresión regular. Como el recorrido poda los directorios excluidos, para
+    cada entrada basta con comprobar la propia ruta (sus ancestros ya se
+    comprobaron), de modo que el coste por entrada es una búsqueda en un
+    conjunto, independiente del número de exclusiones literales.
+    """
+
+    GLOB_CHARS = frozenset("*?[")
+
+    def __init__(self, exclusions: list[Path | str], root: Path | str | None = None):
+        """
+        Compila la lista de exclusiones.
+
+        Args:
+            exclusions (list[Path | str]): Rutas de directorios y patrones glob.
+            root (Path | str | None): Directorio desde el que se toman las rutas
+                y patrones relativos (por defecto, el directorio actual).
+        """
+        root = Path(root or ".").resolve()
+        self.prefixes = set()
+        path_patterns, name_patterns = [], []
+        for exclusion in exclusions:
+            text = str(exclusion)
+            # Sin separador ('node_modules', '*.tmp') se compara solo el nombre, en cualquier nivel
+            if os.sep not in text and not (os.altsep and os.altsep in text):
+                name_patterns.append(fnmatch.translate(os.path.normcase(text)))
+            elif self.GLOB_CHARS.isdisjoint(text):
+                self.prefixes.add(self.normalize((root / text).resolve()))
+            else:
+                # Un patrón relativo ('build/*.o') se ancla en la raíz; sus comodines no
+                # se aplican a la raíz, que se escapa por si contiene '[' o '*'
+                if not os.path.isabs(text):
+                    text = os.path.join(glob.escape(str(root)), text)
+                path_patterns.append(fnmatch.translate(os.path.normcase(os.path.normpath(text))))
+        self.path_regex = re.compile("|".join(path_patterns)) if path_patterns else None
+        self.name_regex = re.compile("|".join(name_patterns)) if name_patterns else None
+
+    def __len__(self) -> int:
+        """Devuelve el número de rutas literales excluidas."""
+        return len(self.prefixes)
+
+    @staticmethod
+    def normalize(path: Path | str) -> str:
+        """Normaliza una ruta para la comparación (mayúsculas en Windows, separadores)."""
+        return os.path.normcase(os.path.normpath(path))
+
+    def matches(self, path: str, name: str) -> bool:
+        """
+        Indica si una entrada del recorrido está excluida.
+
+        Args:
+            path (str): Ruta absoluta de la entrada, construida a partir de la
+                raíz ya resuelta (no se vuelve a resolver).
+            name (str): Nombre de la entrada.
+
+        Returns:
+            bool: True si la entrada debe saltarse.
+        """
+        if self.prefixes and os.path.normcase(path) in self.prefixes:
+            return True
+        if self.name_regex and self.name_regex.match(os.path.normcase(name)):
+            return True
+        return bool(self.path_regex and self.path_regex.match(os.path.normcase(path)))
+
+    def excludes_tree(self, root: Path) -> bool:
+        """
+        Indica si la raíz del escaneo o alguno de sus ancestros está excluido.
+
+        Args:
+            root (Path): Raíz del escaneo ya resuelta.
+
+        Returns:
+            bool: True si no hay nada que escanear.
+        """
+        return any(self.matches(str(p), p.name) for p in (root, *root.parents))
+
+
+def _get_buffer(buffer_size: int) -> memoryview:
     """
-    Calcula el hash SHA-256 de un archivo en bloques.
+    Devuelve el búfer de lectura reutilizable del hilo actual.
 
     Args:
-        file_path (Path): La ruta al archivo.
+        buffer_size (int): Tamaño en bytes del búfer.
 
     Returns:
-        str | None: El hash SHA-256 del archivo como string hexadecimal, o None si hay un error.
+        memoryview: Vista sobre un bytearray de buffer_size bytes.
+    """
+    view = getattr(_thread_buffers, "view", None)
+    if view is None or len(view) != buffer_size:
+        view = memoryview(bytearray(buffer_size))
+        _thread_buffers.view = view
+    return view
+
+
+def _fadvise(fd: int, advice_name: str) -> None:
+    """Aplica posix_fadvise a todo el archivo si el sistema lo soporta."""
+    advice = getattr(os, advice_name, None)
+    if advice is not None:
+        try:
+            os.posix_fadvise(fd, 0, 0, advice)
+        except OSError:
+            pass
+
+
+def calculate_hash(file_path: Path | str, algorithm: str = DEFAULT_HASH, buffer_size: int = BUFFER_SIZE,
+                   mmap_threshold: int = MMAP_THRESHOLD, drop_cache: bool = True) -> str | None:
+    """
+    Calcula el hash de un archivo en bloques sin crear un objeto bytes por bloque.
+
+    Los archivos pequeños y medianos se leen con readinto() sobre un búfer
+    reutilizable por hilo; los grandes se proyectan en memoria con mmap y se
+    pasan de una vez al objeto hash. En POSIX se avisa al núcleo de que la
+    lectura es secuencial y, al terminar, de que las páginas ya no se necesitan.
+
+    Args:
+        file_path (Path | str): La ruta al archivo.
+        algorithm (str): Nombre del algoritmo en HASH_ALGORITHMS.
+        buffer_size (int): Tamaño en bytes de cada bloque leído.
+        mmap_threshold (int): Tamaño a partir del cual se usa mmap (0 lo desactiva).
+        drop_cache (bool): Si se liberan las páginas leídas de la caché del sistema.
+
+    Returns:
+        str | None: El hash del archivo como string hexadecimal, o None si hay un error.
     """
     try:
-        hasher = hashlib.sha256()
-        with file_path.open('rb') as f:
-            while chunk := f.read(BUFFER_SIZE):
-                hasher.update(chunk)
+        hasher = HASH_ALGORITHMS[algorithm]()
+        with open(file_path, 'rb', buffering=0) as f:
+            fd = f.fileno()
+            _fadvise(fd, "POSIX_FADV_SEQUENTIAL")
+            if mmap_threshold and os.fstat(fd).st_size >= mmap_threshold:
+                with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    hasher.update(mm)
+            else:
+                view = _get_buffer(buffer_size)
+                while n := f.readinto(view):
+                    hasher.update(view[:n])
+            if drop_cache:
+                _fadvise(fd, "POSIX_FADV_DONTNEED")
+        return hasher.hexdigest()
+    except (IOError, PermissionError, ValueError) as e:
+        logger.warning(f"No se pudo leer el archivo '{file_path}': {e}")
+        return None
+
+
+def calculate_partial_hash(file_path: Path | str, file_size: int, chunk_size: int = PARTIAL_HASH_SIZE,
+                           algorithm: str = DEFAULT_HASH) -> str | None:
+    """
+    Calcula un hash rápido usando solo el inicio y el final de un archivo.
+
+    Se usa como filtro previo: dos archivos con distinto hash parcial no pueden
+    ser duplicados, por lo que solo los que coinciden necesitan el hash completo.
+
+    Args:
+        file_path (Path | str): La ruta al archivo.
+        file_size (int): Tamaño del archivo en bytes (obtenido en el recorrido).
+        chunk_size (int): Bytes a leer del inicio y del final del archivo.
+        algorithm (str): Nombre del algoritmo en HASH_ALGORITHMS.
+
+    Returns:
+        str | None: El hash parcial como string hexadecimal, o None si hay un error.
+    """
+    try:
+        hasher = HASH_ALGORITHMS[algorithm]()
+        with open(file_path, 'rb') as f:
+            hasher.update(f.read(chunk_size))
+            if file_size > chunk_size:
+                f.seek(max(chunk_size, file_size - chunk_size))
+                hasher.update(f.read(chunk_size))
         return hasher.hexdigest()
     except (IOError, PermissionError) as e:
         logger.warning(f"No se pudo leer el archivo '{file_path}': {e}")
         return None
 
 
-def find_duplicate_files(directory: Path, exclude_dirs: list[Path] = None) -> dict:
+class HashCache:
+    """
+    Caché persistente en SQLite de los hashes calculados.
+
+    Cada entrada se identifica por (dispositivo, inodo) y solo se considera
+    válida si el tamaño, la fecha de modificación (en nanosegundos) y el
+    algoritmo de hash coinciden con los del escaneo actual. Se guardan tanto el hash parcial como el
+    completo, de modo que una segunda ejecución sobre un árbol sin cambios no
+    necesita leer el contenido de ningún archivo.
+    """
+
+    # Escrituras y segundos entre cada commit, lo que ocurra antes, para no
+    # perder todo si el proceso muere (con archivos grandes 1000 hashes son horas)
+    COMMIT_INTERVAL = 1000
+    COMMIT_SECONDS = 30
+
+    def __init__(self, db_path: Path, algorithm: str = DEFAULT_HASH):
+        """
+        Abre (o crea) la base de datos de la caché.
+
+        Args:
+            db_path (Path): Ruta al fichero SQLite.
+            algorithm (str): Algoritmo de hash de los valores guardados.
+        """
+        self.db_path = db_path
+        self.algorithm = algorithm
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " dev INTEGER NOT NULL, ino INTEGER NOT NULL,"
+            " size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+            " path TEXT NOT NULL, partial_hash TEXT, full_hash TEXT,"
+            f" algorithm TEXT NOT NULL DEFAULT '{DEFAULT_HASH}',"
+            " PRIMARY KEY (dev, ino))"
+        )
+        # Las cachés creadas por versiones anteriores no tienen columna de algoritmo
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(hashes)")}
+        if "algorithm" not in columns:
+            self.conn.execute(f"ALTER TABLE hashes ADD COLUMN algorithm TEXT NOT NULL DEFAULT '{DEFAULT_HASH}'")
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def get(self, st: FileStat, column: str) -> str | None:
+        """
+        Devuelve el hash guardado para un archivo si sigue siendo válido.
+
+        Args:
+            st (FileStat): Metadatos actuales del archivo.
+            column (str): 'partial_hash' o 'full_hash'.
+
+        Returns:
+            str | None: El hash en caché, o None si no existe o está obsoleto.
+        """
+        row = self.conn.execute(
+            f"SELECT {column} FROM hashes WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ? AND algorithm = ?",
+            (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, self.algorithm),
+        ).fetchone()
+        if row and row[0]:
+            self.hits += 1
+            return row[0]
+        self.misses += 1
+        return None
+
+    def put(self, file_path: Path | str, st: FileStat, column: str, digest: str) -> None:
+        """
+        Guarda un hash en la caché, invalidando el otro hash si el archivo o el algoritmo cambió.
+
+        Args:
+            file_path (Path | str): Ruta del archivo.
+            st (FileStat): Metadatos del archivo en el momento del cálculo.
+            column (str): 'partial_hash' o 'full_hash'.
+            digest (str): Hash hexadecimal calculado.
+        """
+        self.conn.execute(
+            "INSERT INTO hashes (dev, ino, size, mtime_ns, path, partial_hash, full_hash, algorithm)"
+            " VALUES (?, ?, ?, ?, ?, NULL, NULL, ?)"
+            " ON CONFLICT (dev, ino) DO UPDATE SET path = excluded.path,"
+            " partial_hash = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns"
+            "                AND algorithm = excluded.algorithm THEN partial_hash END,"
+            " full_hash = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns"
+            "             AND algorithm = excluded.algorithm THEN full_hash END,"
+            " size = excluded.size, mtime_ns = excluded.mtime_ns, algorithm = excluded.algorithm",
+            (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, os.path.abspath(file_path), self.algorithm),
+        )
+        self.conn.execute(
+            f"UPDATE hashes SET {column} = ? WHERE dev = ? AND ino = ?",
+            (digest, st.st_dev, st.st_ino),
+        )
+        self._pending += 1
+        now = time.monotonic()
+        if self._pending >= self.COMMIT_INTERVAL or now - self._last_commit >= self.COMMIT_SECONDS:
+            self.conn.commit()
+            self._pending = 0
+            self._last_commit = now
+
+    def evict_missing(self, root: Path, seen: set[tuple[int, int]]) -> int:
+        """
+        Elimina las entradas de archivos bajo 'root' que no aparecieron en el escaneo.
+
+        Args:
+            root (Path): Directorio raíz escaneado.
+            seen (set[tuple[int, int]]): Pares (dispositivo, inodo) encontrados.
+
+        Returns:
+            int: Número de entradas eliminadas.
+        """
+        root_str = os.path.abspath(root)
+        prefix = root_str.rstrip(os.sep) + os.sep
+        stale = [
+            (dev, ino)
+            for dev, ino, path in self.conn.execute("SELECT dev, ino, path FROM hashes")
+            if (path == root_str or path.startswith(prefix)) and (dev, ino) not in seen
+        ]
+        self.conn.executemany("DELETE FROM hashes WHERE dev = ? AND ino = ?", stale)
+        return len(stale)
+
+    def close(self) -> None:
+        """Confirma los cambios pendientes y cierra la base de datos."""
+        self.conn.commit()
+        self.conn.close()
+
+
+class ScanCheckpoint:
+    """
+    Punto de control del recorrido guardado en SQLite.
+
+    Guarda los archivos de los directorios ya completados y la pila de
+    directorios pendientes (ya podados de exclusiones), de modo que un
+    escaneo reanudado continúa donde se quedó sin volver a recorrer los
+    subárboles terminados. Los hashes se guardan aparte en HashCache.
+    """
+
+    # Segundos entre cada guardado del progreso del recorrido
+    SAVE_INTERVAL = 30
+
+    def __init__(self, db: Path | sqlite3.Connection, root: Path, follow_symlinks: bool = False,
+                 resume: bool = False, exclusions: list[Path | str] | None = None):
+        """
+        Abre el punto de control y decide si se puede reanudar.
+
+        Args:
+            db (Path | sqlite3.Connection): Fichero SQLite o conexión compartida
+                (por ejemplo, la de HashCache).
+            root (Path): Directorio raíz del escaneo.
+            follow_symlinks (bool): Opción del recorrido, debe coincidir al reanudar.
+            resume (bool): Si se intenta reanudar un escaneo anterior.
+            exclusions (list[Path | str] | None): Exclusiones del recorrido; la
+                pila guardada ya está podada con ellas, así que deben coincidir
+                al reanudar.
+        """
+        self._owns_connection = not isinstance(db, sqlite3.Connection)
+        self.conn = sqlite3.connect(db) if self._owns_connection else db
+        self.conn.execute("CREATE TABLE IF NOT EXISTS walk_state (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS walk_files ("
+            " path TEXT NOT NULL, size INTEGER, dev INTEGER, ino INTEGER, mtime_ns INTEGER)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS walk_pending (path TEXT NOT NULL, abs_path TEXT NOT NULL)")
+        self.options = {
+            "root": os.path.abspath(root), "follow_symlinks": str(follow_symlinks),
+            "exclusions": json.dumps(sorted(str(e) for e in exclusions or [])),
+        }
+        self.last_save = time.monotonic()
+
+        state = dict(self.conn.execute("SELECT key, value FROM walk_state"))
+        self.resuming = resume and bool(state) and all(state.get(k) == v for k, v in self.options.items())
+        if resume and not self.resuming:
+            logger.warning("El punto de control no existe o es de otro escaneo. Se empieza desde el principio.")
+        if not self.resuming:
+            self.clear()
+        self.walk_done = self.resuming and state.get("walk_done") == "1"
+
+    def saved_files(self):
+        """
+        Devuelve los archivos guardados por el escaneo anterior.
+
+        Yields:
+            tuple[str, FileStat]: Ruta del archivo y sus metadatos.
+        """
+        for path, size, dev, ino, mtime_ns in self.conn.execute(
+            "SELECT path, size, dev, ino, mtime_ns FROM walk_files ORDER BY rowid"
+        ):
+            yield path, FileStat(size, dev, ino, mtime_ns)
+
+    def pending_dirs(self) -> list[tuple[str, str]]:
+        """Devuelve la pila de directorios pendientes del escaneo anterior."""
+        return list(self.conn.execute("SELECT path, abs_path FROM walk_pending ORDER BY rowid"))
+
+    def save(self, stack: list[tuple[str, str]], new_files: list[tuple[str, FileStat]], done: bool = False,
+             force: bool = False) -> bool:
+        """
+        Guarda el progreso si ha pasado SAVE_INTERVAL desde el último guardado.
+
+        Args:
+            stack (list[tuple[str, str]]): Directorios pendientes (ruta, ruta absoluta).
+            new_files (list[tuple[str, FileStat]]): Archivos de directorios
+                completados desde el último guardado.
+            done (bool): Si el recorrido ha terminado.
+            force (bool): Guarda aunque no haya pasado el intervalo.
+
+        Returns:
+            bool: True si se guardó (el llamante debe vaciar new_files).
+        """
+        if not (done or force or time.monotonic() - self.last_save >= self.SAVE_INTERVAL):
+            return False
+        self.conn.executemany(
+            "INSERT INTO walk_files (path, size, dev, ino, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+            ((path, *st) for path, st in new_files),
+        )
+        self.conn.execute("DELETE FROM walk_pending")
+        self.conn.executemany("INSERT INTO walk_pending (path, abs_path) VALUES (?, ?)", stack)
+        state = {**self.options, "walk_done": "1" if done else "0"}
+        self.conn.executemany("INSERT OR REPLACE INTO walk_state (key, value) VALUES (?, ?)", state.items())
+        self.conn.commit()
+        self.last_save = time.monotonic()
+        return True
+
+    def clear(self) -> None:
+        """Borra el estado del recorrido (los hashes en caché se conservan)."""
+        for table in ("walk_state", "walk_files", "walk_pending"):
+            self.conn.execute(f"DELETE FROM {table}")
+        self.conn.commit()
+
+    def close(self) -> None:
+        """Confirma los cambios y cierra la conexión si es propia."""
+        self.conn.commit()
+        if self._owns_connection:
+            self.conn.close()
+
+
+def scan_files(directory: Path, matcher: ExclusionMatcher, follow_symlinks: bool = False,
+               need_identity: bool = False, checkpoint: ScanCheckpoint | None = None):
     """
-    Busca archivos duplicados en un directorio y sus subdirectorios en una
-    sola pasada, usando poda de directorios excluidos.
+    Recorre el árbol de directorios con os.scandir, con poda de exclusiones.
+
+    Los metadatos de cada archivo se obtienen de DirEntry: el tipo viene de la
+    propia lectura del directorio (sin syscall) y stat() se hace una sola vez
+    por archivo y se cachea, de modo que tamaño, dispositivo, inodo y fecha
+    de modificación llegan a la etapa de hash sin nuevas llamadas al sistema.
+    Solo se devuelven archivos regulares: FIFOs, sockets y dispositivos se
+    saltan porque abrirlos puede bloquear calculate_hash().
 
     Args:
         directory (Path): Directorio a escanear.
-        exclude_dirs (list[Path]): Lista de rutas de directorios a excluir.
+        matcher (ExclusionMatcher): Comparador de exclusiones precompilado.
+        follow_symlinks (bool): Si se siguen los enlaces simbólicos.
+        need_identity (bool): Garantiza st_dev/st_ino válidos (en Windows
+            DirEntry.stat() los deja a cero y hace falta un os.stat()).
+        checkpoint (ScanCheckpoint | None): Punto de control para guardar y
+            reanudar el recorrido.
+
+    Yields:
+        tuple[str, FileStat]: Ruta del archivo y sus metadatos.
+    """
+    # La raíz se resuelve una sola vez; las rutas absolutas de cada entrada se
+    # construyen a partir de ella sin volver a llamar a resolve()
+    root = os.fspath(directory)
+    stack = [(root, str(Path(root).resolve()))]
+    if checkpoint and checkpoint.resuming:
+        logger.info("Reanudando el recorrido desde el punto de control...")
+        yield from checkpoint.saved_files()
+        if checkpoint.walk_done:
+            return
+        stack = checkpoint.pending_dirs()
+
+    visited = set()
+    # Archivos de directorios completados aún no guardados en el punto de control
+    new_files = []
+    while stack:
+        dirpath, abs_dirpath = stack.pop()
+        # Identidad del directorio para detectar bucles de enlaces y uniones
+        try:
+            dir_st = os.stat(dirpath)
+        except OSError as e:
+            logger.warning(f"No se pudo acceder al directorio '{dirpath}': {e}")
+            continue
+        if (dir_st.st_dev, dir_st.st_ino) in visited:
+            logger.debug(f"Saltando directorio ya visitado (bucle de enlaces): '{dirpath}'")
+            continue
+        visited.add((dir_st.st_dev, dir_st.st_ino))
+
+        subdirs, dir_files = [], []
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    try:
+                        if entry.is_symlink() and not follow_symlinks:
+                            continue
+                        # Poda de directorios: no se apilan los excluidos
+                        if entry.is_dir(follow_symlinks=follow_symlinks):
+                            abs_path = os.path.join(abs_dirpath, entry.name)
+                            if not matcher.matches(abs_path, entry.name):
+                                subdirs.append((entry.path, abs_path))
+                            continue
+                        if not entry.is_file(follow_symlinks=follow_symlinks):
+                            logger.debug(f"Saltando archivo especial: '{entry.path}'")
+                            continue
+                        if matcher.matches(os.path.join(abs_dirpath, entry.name), entry.name):
+                            logger.debug(f"Saltando archivo excluido: '{entry.path}'")
+                            continue
+                        st = entry.stat(follow_symlinks=follow_symlinks)
+                        if need_identity and not st.st_ino:
+                            st = os.stat(entry.path, follow_symlinks=follow_symlinks)
+                    except OSError as e:
+                        logger.warning(f"No se pudo acceder a '{entry.path}': {e}")
+                        continue
+                    dir_files.append((entry.path, FileStat(st.st_size, st.st_dev, st.st_ino, st.st_mtime_ns)))
+        except OSError as e:
+            logger.warning(f"No se pudo leer el directorio '{dirpath}': {e}")
+            continue
+        # Se apilan en orden inverso para recorrerlos en el orden del directorio
+        stack.extend(reversed(subdirs))
+        # El directorio está completo: es un punto consistente para guardar el progreso
+        if checkpoint:
+            new_files.extend(dir_files)
+            if checkpoint.save(stack, new_files):
+                new_files.clear()
+        yield from dir_files
+
+    if checkpoint:
+        checkpoint.save(stack, new_files, done=True)
+
+
+def group_files_by_size(directory: Path, matcher: ExclusionMatcher, follow_symlinks: bool = False,
+                        need_identity: bool = False,
+                        checkpoint: ScanCheckpoint | None = None) -> dict[int, list[tuple[str, FileStat]]]:
+    """
+    Recorre el árbol de directorios y agrupa los archivos por su tamaño,
+    usando poda de directorios excluidos.
+
+    Args:
+        directory (Path): Directorio a escanear.
+        matcher (ExclusionMatcher): Comparador de exclusiones precompilado.
+        follow_symlinks (bool): Si se siguen los enlaces simbólicos.
+        need_identity (bool): Si se necesitan st_dev/st_ino válidos (caché).
+        checkpoint (ScanCheckpoint | None): Punto de control del recorrido.
+
+    Returns:
+        dict[int, list[tuple[str, FileStat]]]: Diccionario tamaño en
+            bytes -> pares (ruta, metadatos) de los archivos con ese tamaño.
+    """
+    files_by_size = defaultdict(list)
+
+    # Recorrido único con tqdm y poda de directorios
+    with tqdm(desc="Escaneando archivos", unit=" archivos") as pbar:
+        for file_path, st in scan_files(directory, matcher, follow_symlinks, need_identity, checkpoint):
+            files_by_size[st.st_size].append((file_path, st))
+            pbar.update(1)
+
+    return files_by_size
+
+
+def collapse_hardlinks(entries: list[tuple[str, FileStat]], follow_symlinks: bool = False):
+    """
+    Reúne los enlaces duros de un grupo de archivos del mismo tamaño.
+
+    Varias rutas con el mismo (dispositivo, inodo) son un único archivo: no
+    desperdician espacio ni hace falta calcular su hash más de una vez. En
+    Windows DirEntry.stat() no da el inodo, así que se pide con os.stat(),
+    solo para estos candidatos y no para todo el árbol.
+
+    Args:
+        entries (list[tuple[str, FileStat]]): Pares (ruta, metadatos).
+        follow_symlinks (bool): Si se siguen los enlaces simbólicos.
 
     Returns:
-        dict: Diccionario donde las claves son los hashes de los archivos y los
-              valores son las rutas de los archivos con ese hash.
+        tuple[list[tuple[str, FileStat]], dict[str, list[str]]]: Una entrada
+            por archivo distinto y, para cada ruta conservada que tiene otros
+            enlaces duros, las demás rutas del mismo archivo.
+    """
+    unique, links, first_path = [], {}, {}
+    for file_path, st in entries:
+        if not st.st_ino:
+            try:
+                full_st = os.stat(file_path, follow_symlinks=follow_symlinks)
+            except OSError as e:
+                logger.warning(f"No se pudo acceder a '{file_path}': {e}")
+                continue
+            st = st._replace(st_dev=full_st.st_dev, st_ino=full_st.st_ino)
+        # Sin número de inodo (algunos sistemas de archivos) no se puede reunir nada
+        key = (st.st_dev, st.st_ino) if st.st_ino else None
+        if key in first_path:
+            links.setdefault(first_path[key], []).append(file_path)
+            continue
+        if key:
+            first_path[key] = file_path
+        unique.append((file_path, st))
+    return unique, links
+
+
+def hash_entries(entries, hash_func, column: str, workers: int = 1, cache: HashCache | None = None):
+    """
+    Calcula el hash de cada archivo, en paralelo si se indica más de un hilo.
+
+    El hilo principal actúa como productor: consulta la caché (SQLite solo se
+    usa desde este hilo) y envía los archivos pendientes a un pool de hilos,
+    manteniendo como máximo unas pocas tareas por hilo en vuelo para acotar
+    la memoria. Los resultados se devuelven en el mismo orden de entrada.
+
+    Args:
+        entries (Iterable[tuple]): Tuplas cuyos dos primeros elementos son la
+            ruta y los metadatos (FileStat); el resto se devuelve intacto.
+        hash_func (Callable[[str, FileStat], str | None]): Función de hash.
+        column (str): Columna de la caché asociada ('partial_hash' o 'full_hash').
+        workers (int): Número de hilos de cálculo; 1 para cálculo secuencial.
+        cache (HashCache | None): Caché persistente de hashes opcional.
+
+    Yields:
+        tuple[tuple, str | None]: La entrada original y su hash calculado.
+    """
+    def collect(entry, result):
+        # Los resultados ya resueltos (caché o cálculo secuencial) se devuelven tal cual
+        if not isinstance(result, Future):
+            return entry, result
+        file_hash = result.result()
+        if file_hash and cache:
+            cache.put(entry[0], entry[1], column, file_hash)
+        return entry, file_hash
+
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    pending = deque()
+    try:
+        for entry in entries:
+            file_path, st = entry[0], entry[1]
+            result = cache.get(st, column) if cache else None
+            if result:
+                pending.append((entry, result))
+            elif executor:
+                pending.append((entry, executor.submit(hash_func, file_path, st)))
+            else:
+                file_hash = hash_func(file_path, st)
+                if file_hash and cache:
+                    cache.put(file_path, st, column, file_hash)
+                pending.append((entry, file_hash))
+            while len(pending) > workers * 4:
+                yield collect(*pending.popleft())
+        while pending:
+            yield collect(*pending.popleft())
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def verify_group(paths: list[str], mode: str, buffer_size: int = BUFFER_SIZE) -> list[list[str]]:
+    """
+    Confirma que los archivos de un grupo con el mismo hash son idénticos.
+
+    Args:
+        paths (list[str]): Rutas de los archivos con el mismo hash.
+        mode (str): 'sha256' para recalcular con SHA-256 o 'bytes' para
+            comparar el contenido byte a byte.
+        buffer_size (int): Tamaño en bytes del búfer para el SHA-256.
+
+    Returns:
+        list[list[str]]: Subgrupos de archivos realmente idénticos (con al
+            menos dos archivos cada uno).
+    """
+    if mode == "sha256":
+        by_hash = defaultdict(list)
+        for path in paths:
+            digest = calculate_hash(path, "sha256", buffer_size)
+            if digest:
+                by_hash[digest].append(path)
+        groups = list(by_hash.values())
+    else:
+        # Cada archivo se compara con el representante de cada subgrupo
+        groups = []
+        for path in paths:
+            for group in groups:
+                try:
+                    if filecmp.cmp(group[0], path, shallow=False):
+                        group.append(path)
+                        break
+                except OSError as e:
+                    logger.warning(f"No se pudo comparar '{path}' con '{group[0]}': {e}")
+                    break
+            else:
+                groups.append([path])
+        filecmp.clear_cache()
+    if len(groups) > 1:
+        logger.warning(f"La verificación ({mode}) ha separado un grupo de {len(paths)} archivos con el mismo hash.")
+    return [group for group in groups if len(group) > 1]
+
+
+def iter_duplicate_groups(directory: Path, exclude_dirs: list[Path | str] = None, cache: HashCache | None = None,
+                          workers: int = 1, follow_symlinks: bool = False, algorithm: str = DEFAULT_HASH,
+                          verify: str | None = None, buffer_size: int = BUFFER_SIZE,
+                          checkpoint: ScanCheckpoint | None = None):
+    """
+    Busca archivos duplicados en un directorio y sus subdirectorios mediante
+    un proceso por etapas que minimiza los bytes leídos del disco:
+
+        1. Agrupa los archivos por tamaño; un tamaño único no puede tener duplicados.
+        2. Calcula un hash parcial (inicio y final) de los candidatos del mismo tamaño.
+        3. Calcula el hash completo solo de los que siguen coincidiendo.
+        4. Opcionalmente, verifica cada grupo con SHA-256 o byte a byte.
+
+    Tras la etapa 1 los enlaces duros de un mismo archivo se reúnen por
+    (dispositivo, inodo): solo se calcula el hash de una de sus rutas y el
+    grupo cuenta el archivo una sola vez.
+
+    Las etapas 2 a 4 están encadenadas como generadores: cada grupo de
+    duplicados se devuelve en cuanto se confirma, y los grupos ya procesados
+    se liberan, de modo que el informe puede escribirse de forma incremental.
+
+    Args:
+        directory (Path): Directorio a escanear.
+        exclude_dirs (list[Path | str]): Rutas de directorios y patrones glob a excluir.
+        cache (HashCache | None): Caché persistente de hashes opcional.
+        workers (int): Número de hilos para el cálculo de hashes.
+        follow_symlinks (bool): Si se siguen los enlaces simbólicos.
+        algorithm (str): Algoritmo de hash (ver HASH_ALGORITHMS).
+        verify (str | None): Verificación de grupos: 'sha256', 'bytes' o None.
+        buffer_size (int): Tamaño en bytes del búfer de lectura.
+        checkpoint (ScanCheckpoint | None): Punto de control del recorrido; los
+            hashes se guardan en 'cache', que debe indicarse para reanudarlos.
+
+    Yields:
+        tuple[str, int, list[str], dict[str, list[str]], int]: Hash, tamaño en
+            bytes de cada archivo, una ruta por cada archivo distinto (inodo),
+            para las rutas que tienen más enlaces duros las demás rutas del
+            archivo y el número de subgrupo (distinto de 0 solo cuando la
+            verificación separa archivos con el mismo hash).
     """
     if not directory.is_dir():
         logger.error(f"El directorio '{directory}' no existe o no es accesible.")
-        return {}
+        return
 
-    file_hashes = defaultdict(list)
-    exclude_dirs = [d.resolve() for d in exclude_dirs or []]
+    matcher = ExclusionMatcher(exclude_dirs or [], directory)
+    if matcher.excludes_tree(directory.resolve()):
+        logger.warning(f"El directorio '{directory}' está dentro de una ruta excluida.")
+        return
 
-    # Recorrido único con tqdm y poda de directorios
-    logger.info("Escaneando y calculando hashes. Esto puede tardar un poco...")
-    with tqdm(desc="Escaneando archivos", unit=" archivos") as pbar:
-        # Usamos Path.walk() que es más "Pythonic" y optimizado para este caso
-        for dirpath, dirnames, filenames in Path(directory).walk():
-            # Poda de directorios: Modifica 'dirnames' in-place para que walk() no entre
-            dirnames[:] = [d for d in dirnames if not any((dirpath / d).resolve().is_relative_to(excluded) for excluded in exclude_dirs)]
-            
-            for filename in filenames:
-                file_path = dirpath / filename
-                # Asegurarse de que el archivo no está en un subdirectorio excluido
-                if not any(file_path.resolve().is_relative_to(excluded) for excluded in exclude_dirs):
-                    file_hash = calculate_hash(file_path)
-                    if file_hash:
-                        file_hashes[file_hash].append(file_path)
-                    pbar.update(1)
+    # Etapa 1: agrupación por tamaño (solo metadatos, sin leer contenido)
+    logger.info("Escaneando archivos y agrupando por tamaño. Esto puede tardar un poco...")
+    files_by_size = group_files_by_size(directory, matcher, follow_symlinks, need_identity=cache is not None,
+                                        checkpoint=checkpoint)
+    if cache:
+        seen = {(st.st_dev, st.st_ino) for entries in files_by_size.values() for _, st in entries}
+        evicted = cache.evict_missing(directory, seen)
+        logger.info(f"Eliminadas {evicted} entradas de la caché de archivos que ya no existen.")
+    # Los tamaños únicos se descartan para liberar memoria antes de leer contenido
+    size_groups = {size: paths for size, paths in files_by_size.items() if len(paths) > 1}
+    del files_by_size
+    # Los enlaces duros se reúnen antes de leer contenido; un tamaño que solo
+    # tenía enlaces de un mismo archivo deja de ser candidato
+    links, linked = {}, 0
+    for size in list(size_groups):
+        unique, group_links = collapse_hardlinks(size_groups[size], follow_symlinks)
+        links.update(group_links)
+        linked += sum(len(p) for p in group_links.values())
+        if len(unique) > 1:
+            size_groups[size] = unique
+        else:
+            del size_groups[size]
+    if linked:
+        logger.info(f"{linked} rutas son enlaces duros de otro archivo candidato y no se vuelven a leer.")
+    logger.info(f"{sum(len(p) for p in size_groups.values())} archivos comparten tamaño con otro archivo.")
+
+    def candidate_groups():
+        """Genera los grupos de candidatos (mismo tamaño y hash parcial)."""
+        # En archivos pequeños el hash parcial leería lo mismo que el completo
+        for size in [size for size in size_groups if size <= 2 * PARTIAL_HASH_SIZE]:
+            yield size_groups.pop(size)
+
+        # Etapa 2: hash parcial de los archivos grandes con el mismo tamaño. Las
+        # entradas llegan ordenadas por tamaño, así que cada tamaño es un bloque contiguo
+        def partial_entries():
+            for size in list(size_groups):
+                yield from size_groups.pop(size)
+
+        total = sum(len(p) for p in size_groups.values())
+        partial_hashes, current_size = defaultdict(list), None
+        with tqdm(total=total, desc="Hash parcial", unit=" archivos") as pbar:
+            for entry, partial_hash in hash_entries(
+                partial_entries(), lambda path, st: calculate_partial_hash(path, st.st_size, algorithm=algorithm),
+                "partial_hash", workers, cache,
+            ):
+                if entry[1].st_size != current_size:
+                    yield from (p for p in partial_hashes.values() if len(p) > 1)
+                    partial_hashes, current_size = defaultdict(list), entry[1].st_size
+                if partial_hash:
+                    partial_hashes[partial_hash].append(entry)
+                pbar.update(1)
+        yield from (p for p in partial_hashes.values() if len(p) > 1)
+
+    def full_entries():
+        for group_id, group in enumerate(candidate_groups()):
+            for file_path, st in group:
+                yield file_path, st, group_id
+
+    def confirmed_groups(file_hashes):
+        for hash_val, paths in file_hashes.items():
+            group_links = {path: links.pop(path) for path in paths if path in links}
+            if len(paths) < 2:
+                continue
+            size = sizes[hash_val]
+            if not verify:
+                yield hash_val, size, paths, group_links, 0
+                continue
+            # Etapa 4: verificación de los grupos con un método independiente del hash
+            for subgroup, group in enumerate(verify_group(paths, verify, buffer_size)):
+                yield (hash_val, size, group,
+                       {path: group_links[path] for path in group if path in group_links}, subgroup)
+
+    # Etapa 3: hash completo de los candidatos; un grupo se confirma en cuanto
+    # se han procesado todos sus archivos
+    file_hashes, sizes, current_group = defaultdict(list), {}, None
+    with tqdm(desc="Hash completo", unit=" archivos") as pbar:
+        for (file_path, st, group_id), file_hash in hash_entries(
+            full_entries(), lambda path, st: calculate_hash(path, algorithm, buffer_size), "full_hash", workers, cache,
+        ):
+            if group_id != current_group:
+                yield from confirmed_groups(file_hashes)
+                file_hashes, sizes, current_group = defaultdict(list), {}, group_id
+            if file_hash:
+                file_hashes[file_hash].append(file_path)
+                sizes[file_hash] = st.st_size
+            pbar.update(1)
+        yield from confirmed_groups(file_hashes)
+
+    if cache:
+        logger.info(f"Caché de hashes: {cache.hits} aciertos, {cache.misses} fallos.")
+
+
+def find_duplicate_files(directory: Path, exclude_dirs: list[Path | str] = None, cache: HashCache | None = None,
+                         workers: int = 1, follow_symlinks: bool = False, algorithm: str = DEFAULT_HASH,
+                         verify: str | None = None, buffer_size: int = BUFFER_SIZE) -> dict:
+    """
+    Busca archivos duplicados y devuelve todos los grupos a la vez.
+
+    Es un envoltorio de iter_duplicate_groups() que mantiene todos los grupos
+    en memoria; para volúmenes grandes es preferible iterar el generador.
+
+    Args:
+        Los mismos que iter_duplicate_groups().
+
+    Returns:
+        dict: Diccionario donde las claves son tuplas (hash, subgrupo) y los
+              valores son las rutas de los archivos de ese grupo, incluidos
+              los enlaces duros de cada archivo detrás de su primera ruta.
+    """
+    return {
+        (hash_val, subgroup): [name for path in paths for name in (path, *links.get(path, ()))]
+        for hash_val, _, paths, links, subgroup in iter_duplicate_groups(
+            directory, exclude_dirs, cache, workers, follow_symlinks, algorithm, verify, buffer_size,
+        )
+    }
+
+
+class DuplicateReport:
+    """
+    Escritor incremental del informe de duplicados.
+
+    El fichero se abre al recibir el primer grupo (si no hay duplicados no se
+    crea) y cada grupo se vuelca a disco en cuanto se escribe. Se acumulan
+    solo los totales, no los grupos. Los enlaces duros se listan junto a su
+    archivo, pero el número de archivos y los bytes desperdiciados cuentan
+    cada archivo (inodo) una sola vez.
+    """
+
+    FORMATS = ("text", "jsonl", "csv")
+    CSV_FIELDS = ("timestamp", "hash", "subgroup", "algorithm", "size", "count", "wasted_bytes", "path",
+                  "hardlink_of")
+
+    def __init__(self, output_file: Path, fmt: str = "text", algorithm: str = DEFAULT_HASH):
+        """
+        Prepara el informe sin crear todavía el fichero.
+
+        Args:
+            output_file (Path): Ruta del fichero de salida.
+            fmt (str): Formato de salida ('text', 'jsonl' o 'csv').
+            algorithm (str): Algoritmo de hash que produjo los valores.
+        """
+        self.output_file = output_file
+        self.fmt = fmt
+        self.algorithm = algorithm
+        self.groups = 0
+        self.files = 0
+        self.hardlinks = 0
+        self.wasted_bytes = 0
+        self._file = None
+        self._csv = None
+
+    def _open(self) -> None:
+        """Abre el fichero de salida y escribe la cabecera si el formato la tiene."""
+        self._file = self.output_file.open('w', encoding='utf-8', newline='' if self.fmt == "csv" else None)
+        if self.fmt == "csv":
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(self.CSV_FIELDS)
+
+    def write_group(self, hash_val: str, size: int, paths: list[str],
+                    links: dict[str, list[str]] | None = None, subgroup: int = 0) -> None:
+        """
+        Escribe un grupo de duplicados y lo vuelca a disco.
+
+        Args:
+            hash_val (str): Hash común de los archivos.
+            size (int): Tamaño en bytes de cada archivo.
+            paths (list[str]): Una ruta por cada archivo duplicado distinto.
+            links (dict[str, list[str]] | None): Otros enlaces duros de cada ruta.
+            subgroup (int): Número de subgrupo cuando la verificación separa
+                archivos con el mismo hash (0 si no se ha separado).
+        """
+        if self._file is None:
+            self._open()
+        links = links or {}
+        wasted = size * (len(paths) - 1)
+        timestamp = datetime.now().isoformat()
+        if self.fmt == "jsonl":
+            record = {
+                "timestamp": timestamp, "hash": hash_val, "subgroup": subgroup, "algorithm": self.algorithm, "size": size,
+                "count": len(paths), "wasted_bytes": wasted, "paths": [str(p) for p in paths],
+                "hardlinks": {str(p): [str(n) for n in names] for p, names in links.items()},
+            }
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        elif self.fmt == "csv":
+            for path in paths:
+                self._csv.writerow((timestamp, hash_val, subgroup, self.algorithm, size, len(paths), wasted, path, ""))
+                self._csv.writerows(
+                    (timestamp, hash_val, subgroup, self.algorithm, size, len(paths), wasted, name, path)
+                    for name in links.get(path, ())
+                )
+        else:
+            part = f" (subgrupo {subgroup})" if subgroup else ""
+            self._file.write(f"--- Duplicados con hash {self.algorithm}: {hash_val}{part} ---\n")
+            for path in paths:
+                self._file.write(f"{timestamp} | Archivo duplicado: {path}\n")
+                for name in links.get(path, ()):
+                    self._file.write(f"{timestamp} |   Enlace duro del mismo archivo: {name}\n")
+            self._file.write("\n")
+        self._file.flush()
+        self.groups += 1
+        self.files += len(paths)
+        self.hardlinks += sum(len(names) for names in links.values())
+        self.wasted_bytes += wasted
+
+    def close(self) -> None:
+        """Cierra el fichero de salida si se llegó a abrir."""
+        if self._file is not None:
+            self._file.close()
+
+
+class DedupEngine:
+    """
+    Aplica una acción a cada grupo de duplicados y contabiliza el espacio recuperado.
+
+    En cada grupo se elige un archivo original según la política de
+    conservación y el resto se sustituye por un enlace duro, una copia
+    reflink, se mueve a cuarentena o se borra. Las sustituciones se hacen
+    sobre un nombre temporal en el mismo directorio y se completan con
+    os.replace(), de modo que un fallo nunca deja el duplicado a medias.
+    """
+
+    ACTIONS = ("report", "hardlink", "reflink", "quarantine", "delete")
+    KEEP_POLICIES = ("oldest", "newest", "shortest")
+    # ioctl de Linux para clonar un archivo con copy-on-write (Btrfs, XFS)
+    FICLONE = 0x40049409
+
+    def __init__(self, action: str, keep: str = "oldest", prefer: list[Path] | None = None,
+                 quarantine_dir: Path | None = None, dry_run: bool = False):
+        """
+        Configura el motor de acciones.
+
+        Args:
+            action (str): Una de ACTIONS.
+            keep (str): Política de conservación, una de KEEP_POLICIES.
+            prefer (list[Path] | None): Directorios cuyos archivos se conservan primero.
+            quarantine_dir (Path | None): Directorio de cuarentena.
+            dry_run (bool): Si solo se simulan las acciones.
+        """
+        self.action = action
+        self.keep = keep
+        self.prefer = [ExclusionMatcher.normalize(Path(d).resolve()) for d in prefer or []]
+        self.quarantine_dir = quarantine_dir
+        self.dry_run = dry_run
+        self.groups = 0
+        self.replaced = 0
+        self.failed = 0
+        self.reclaimed_bytes = 0
+
+    def _is_preferred(self, path: str) -> bool:
+        """Indica si una ruta está dentro de algún directorio preferido."""
+        norm = ExclusionMatcher.normalize(os.path.abspath(path))
+        return any(norm == d or norm.startswith(d.rstrip(os.sep) + os.sep) for d in self.prefer)
+
+    def choose_original(self, paths: list[str], links: dict[str, list[str]] | None = None) -> tuple[str, list[str]]:
+        """
+        Elige el archivo que se conserva en un grupo.
+
+        Args:
+            paths (list[str]): Una ruta por cada archivo duplicado distinto.
+            links (dict[str, list[str]] | None): Otros enlaces duros de cada
+                ruta; cuentan para --prefer y para la ruta más corta.
+
+        Returns:
+            tuple[str, list[str]]: El original y el resto de duplicados.
+        """
+        links = links or {}
+
+        def sort_key(item):
+            index, path = item
+            names = (path, *links.get(path, ()))
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = 0
+            policy = {"oldest": mtime, "newest": -mtime, "shortest": min(len(name) for name in names)}[self.keep]
+            return (not any(self._is_preferred(name) for name in names), policy, index)
+
+        ordered = [path for _, path in sorted(enumerate(paths), key=sort_key)]
+        return ordered[0], ordered[1:]
+
+    TMP_ATTEMPTS = 100
+
+    def _reflink(self, original: str, tmp_path: str) -> None:
+        """
+        Crea tmp_path como clon copy-on-write de original (solo Linux).
+
+        Si tmp_path ya existe lanza FileExistsError sin tocarlo; si el clon
+        falla después de crearlo, lo borra.
+        """
+        import fcntl
+        with open(original, 'rb') as src, open(tmp_path, 'xb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), self.FICLONE, src.fileno())
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        try:
+            shutil.copystat(original, tmp_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _replace(self, original: str, duplicate: str) -> None:
+        """Sustituye 'duplicate' por un enlace o un clon de 'original' de forma atómica."""
+        directory, name = os.path.split(duplicate)
+        # Nombre temporal único en el mismo directorio: nunca se reutiliza ni se
+        # borra un archivo que ya existía con ese nombre
+        for _ in range(self.TMP_ATTEMPTS):
+            tmp_path = os.path.join(directory, f".{name}.{secrets.token_hex(4)}.dedup.tmp")
+            try:
+                if self.action == "hardlink":
+                    os.link(original, tmp_path)
                 else:
-                    logger.debug(f"Saltando archivo en directorio excluido: '{file_path}'")
+                    self._reflink(original, tmp_path)
+                break
+            except FileExistsError:
+                continue
+        else:
+            raise FileExistsError(f"No se encontró un nombre temporal libre junto a '{duplicate}'")
+        # A partir de aquí el temporal es propio y se puede borrar si falla la sustitución
+        try:
+            os.replace(tmp_path, duplicate)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _quarantine(self, duplicate: str) -> None:
+        """Mueve un duplicado al directorio de cuarentena conservando su ruta."""
+        relative = Path(os.path.abspath(duplicate))
+        target = self.quarantine_dir.joinpath(*relative.parts[1:])
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(duplicate, target)
+
+    def _apply(self, original: str, duplicate: str) -> None:
+        """Aplica la acción configurada a una ruta (o solo la anuncia en simulación)."""
+        if self.dry_run:
+            logger.info(f"[simulación] {self.action}: '{duplicate}' (se conserva '{original}')")
+        elif self.action in ("hardlink", "reflink"):
+            self._replace(original, duplicate)
+        elif self.action == "quarantine":
+            self._quarantine(duplicate)
+        else:
+            os.remove(duplicate)
+
+    def process_group(self, size: int, paths: list[str], links: dict[str, list[str]] | None = None) -> None:
+        """
+        Aplica la acción configurada a un grupo de duplicados.
+
+        La acción se aplica a todas las rutas de cada archivo duplicado,
+        incluidos sus enlaces duros, de modo que su espacio se libera de verdad.
+
+        Args:
+            size (int): Tamaño en bytes de cada archivo.
+            paths (list[str]): Una ruta por cada archivo duplicado distinto.
+            links (dict[str, list[str]] | None): Otros enlaces duros de cada ruta.
+        """
+        if self.action == "report":
+            return
+        links = links or {}
+        self.groups += 1
+        original, duplicates = self.choose_original(paths, links)
+        try:
+            original_st = os.stat(original)
+        except OSError as e:
+            logger.warning(f"No se pudo acceder al original '{original}': {e}. Se omite el grupo.")
+            self.failed += sum(1 + len(links.get(duplicate, ())) for duplicate in duplicates)
+            return
+
+        for duplicate in duplicates:
+            names = [duplicate, *links.get(duplicate, ())]
+            try:
+                st = os.stat(duplicate)
+            except OSError as e:
+                logger.warning(f"No se pudo acceder a '{duplicate}': {e}")
+                self.failed += len(names)
+                continue
+            # Un enlace duro al mismo inodo no ocupa espacio adicional
+            if (st.st_dev, st.st_ino) == (original_st.st_dev, original_st.st_ino):
+                logger.debug(f"'{duplicate}' ya es un enlace duro de '{original}'.")
+                continue
+            # El archivo cambió desde que se calculó su hash
+            if st.st_size != size:
+                logger.warning(f"'{duplicate}' ha cambiado de tamaño desde el escaneo. Se omite.")
+                self.failed += len(names)
+                continue
+
+            done = 0
+            for name in names:
+                try:
+                    # Solo se toca un enlace que sigue apuntando al archivo comparado
+                    name_st = os.stat(name) if name != duplicate else st
+                    if (name_st.st_dev, name_st.st_ino) != (st.st_dev, st.st_ino):
+                        logger.warning(f"'{name}' ya no es un enlace duro de '{duplicate}'. Se omite.")
+                        self.failed += 1
+                        continue
+                    self._apply(original, name)
+                    done += 1
+                except (OSError, ImportError) as e:
+                    logger.warning(f"No se pudo aplicar '{self.action}' a '{name}': {e}")
+                    self.failed += 1
+            self.replaced += done
+            # El espacio solo se libera al quitar el último enlace duro del archivo
+            if done == len(names) and st.st_nlink <= len(names):
+                self.reclaimed_bytes += size
+
+    def summary(self) -> str:
+        """Devuelve un resumen legible de las acciones realizadas."""
+        verb = "se recuperarían" if self.dry_run else "recuperados"
+        return (f"Acción '{self.action}'{' (simulación)' if self.dry_run else ''}: {self.groups} grupos, "
+                f"{self.replaced} archivos procesados, {self.failed} errores, "
+                f"{self.reclaimed_bytes / 1024 ** 2:.1f} MB {verb}.")
+
+
+def benchmark_exclusions(sizes: tuple[int, ...] = (10, 100, 1000), entries: int = 200) -> None:
+    """
+    Compara el coste por entrada de las exclusiones con listas de distinto tamaño.
+
+    Se mide el método anterior (resolve() + is_relative_to() contra toda la
+    lista) frente a ExclusionMatcher sobre rutas sintéticas bajo el directorio
+    temporal, que no coinciden con ninguna exclusión (el peor caso).
 
-    return {hash_val: paths for hash_val, paths in file_hashes.items() if len(paths) > 1}
+    Args:
+        sizes (tuple[int, ...]): Tamaños de la lista de exclusión a probar.
+        entries (int): Número de rutas sintéticas evaluadas en cada medida.
+    """
+    base = Path(tempfile.gettempdir()).resolve()
+    paths = [base / f"dir{i % 50}" / f"archivo{i}.dat" for i in range(entries)]
+    for size in sizes:
+        exclusions = [base / f"excluido{i}" for i in range(size)]
+
+        start = time.perf_counter()
+        for path in paths:
+            any(path.resolve().is_relative_to(excluded) for excluded in exclusions)
+        legacy = (time.perf_counter() - start) / entries
+
+        matcher = ExclusionMatcher(exclusions)
+        start = time.perf_counter()
+        for path in paths:
+            matcher.matches(str(path), path.name)
+        compiled = (time.perf_counter() - start) / entries
+
+        logger.info(f"{size:>5} exclusiones | resolve()+is_relative_to(): {legacy * 1e6:9.2f} µs/entrada"
+                    f" | ExclusionMatcher: {compiled * 1e6:6.2f} µs/entrada")
+
+
+def benchmark_hashing(sizes_kb: tuple[int, ...] = (4, 1024, 32 * 1024, 128 * 1024), algorithm: str = DEFAULT_HASH,
+                      buffer_size: int = BUFFER_SIZE, repeat: int = 3) -> None:
+    """
+    Compara el bucle f.read() original con calculate_hash() para varios tamaños.
+
+    Se generan archivos temporales con datos aleatorios y se toma el mejor de
+    varios intentos con la caché de páginas caliente, de modo que se mide el
+    coste de CPU y de copias de memoria, no la velocidad del disco.
+
+    Args:
+        sizes_kb (tuple[int, ...]): Tamaños de archivo a probar, en KB.
+        algorithm (str): Algoritmo de hash a usar en ambas versiones.
+        buffer_size (int): Tamaño del búfer de lectura en bytes.
+        repeat (int): Número de repeticiones por medida.
+    """
+    def legacy_hash(path):
+        hasher = HASH_ALGORITHMS[algorithm]()
+        with open(path, 'rb') as f:
+            while chunk := f.read(buffer_size):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def best_time(func, count):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(count):
+                func()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_kb in sizes_kb:
+            path = Path(tmp) / f"bench_{size_kb}.bin"
+            path.write_bytes(os.urandom(size_kb * 1024))
+            # Muchas lecturas para archivos pequeños, una para los grandes
+            count = max(1, (64 * 1024) // size_kb)
+            legacy = best_time(lambda: legacy_hash(path), count)
+            new = best_time(lambda: calculate_hash(path, algorithm, buffer_size, drop_cache=False), count)
+            mb = size_kb * count / 1024
+            logger.info(f"{size_kb:>8} KB | f.read(): {mb / legacy:8.1f} MB/s"
+                        f" | readinto()/mmap: {mb / new:8.1f} MB/s | mejora x{legacy / new:.2f}")
+            path.unlink()
 
 
 def main():
@@ -232,33 +1592,111 @@ def main():
                         help="Ruta a un archivo con directorios a excluir.")
     parser.add_argument("-o", "--output-file", type=Path, default=Path("duplicados.txt"),
                         help="Nombre del archivo de salida. Por defecto: 'duplicados.txt'")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Mide el coste de las exclusiones y del cálculo de hashes y sale.")
+    parser.add_argument("-l", "--follow-symlinks", action="store_true",
+                        help="Sigue los enlaces simbólicos (con detección de bucles).")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Número de hilos para calcular hashes en paralelo. Por defecto: 1")
+    parser.add_argument("-H", "--hash", choices=sorted(HASH_ALGORITHMS), default=DEFAULT_HASH,
+                        help=f"Algoritmo de hash. Por defecto: '{DEFAULT_HASH}'")
+    parser.add_argument("-V", "--verify", choices=("sha256", "bytes"),
+                        help="Verifica los grupos de duplicados con SHA-256 o byte a byte.")
+    parser.add_argument("-b", "--buffer-size", type=int, default=BUFFER_SIZE // 1024,
+                        help=f"Tamaño del búfer de lectura en KB. Por defecto: {BUFFER_SIZE // 1024}")
+    parser.add_argument("-f", "--format", choices=DuplicateReport.FORMATS, default="text",
+                        help="Formato del fichero de salida. Por defecto: 'text'")
+    parser.add_argument("-a", "--action", choices=DedupEngine.ACTIONS, default="report",
+                        help="Acción sobre los duplicados. Por defecto: 'report'")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="Simula las acciones sin modificar archivos.")
+    parser.add_argument("--keep", choices=DedupEngine.KEEP_POLICIES, default="oldest",
+                        help="Archivo que se conserva en cada grupo. Por defecto: 'oldest'")
+    parser.add_argument("--prefer", type=Path, action="append", default=[],
+                        help="Directorio cuyos archivos se conservan con preferencia (repetible).")
+    parser.add_argument("-q", "--quarantine-dir", type=Path,
+                        help="Directorio de cuarentena para '--action quarantine'.")
+    parser.add_argument("-k", "--checkpoint", type=Path,
+                        help="Base de datos SQLite para guardar el progreso del escaneo.")
+    parser.add_argument("-r", "--resume", action="store_true",
+                        help="Reanuda el escaneo desde el último punto de control de --checkpoint.")
+    parser.add_argument("-c", "--cache", type=Path,
+                        help="Base de datos SQLite para reutilizar hashes entre ejecuciones.")
 
     args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requiere indicar el fichero de --checkpoint.")
+    if args.action == "quarantine" and not args.quarantine_dir:
+        parser.error("--action quarantine requiere indicar --quarantine-dir.")
+    # Con hashes no criptográficos no se modifica ningún archivo sin comparar su contenido
+    if args.action != "report" and not args.dry_run and not args.verify and args.hash in ("md5", "xxh3", "xxh64"):
+        logger.warning(f"El hash '{args.hash}' no es criptográfico: se activa '--verify bytes' antes de '{args.action}'.")
+        args.verify = "bytes"
+
+    if args.benchmark:
+        benchmark_exclusions()
+        benchmark_hashing(algorithm=args.hash, buffer_size=max(1, args.buffer_size) * 1024)
+        return
 
     exclude_list = load_exclude_list(args.exclude_file)
     logger.info(f"Escaneando el directorio '{args.directory.resolve()}' en busca de archivos duplicados...")
     
-    # Asegúrate de que los directorios excluidos se resuelvan antes de pasarlos a la función
-    resolved_exclude_list = [d.resolve() for d in exclude_list]
-    logger.info(f"Se excluirán {len(resolved_exclude_list)} directorios.")
+    # Las exclusiones se compilan (y resuelven) una sola vez dentro de find_duplicate_files()
+    logger.info(f"Se excluirán {len(exclude_list)} directorios o patrones.")
+
+    cache = None
+    # Sin --cache, los hashes del punto de control se guardan en su propio fichero
+    cache_path = args.cache or args.checkpoint
+    if cache_path:
+        try:
+            cache = HashCache(cache_path, args.hash)
+            logger.info(f"Usando la caché de hashes '{cache_path}'.")
+        except sqlite3.Error as e:
+            logger.error(f"No se pudo abrir la caché '{cache_path}': {e}. Se continúa sin caché.")
 
-    duplicates = find_duplicate_files(args.directory, exclude_dirs=resolved_exclude_list)
+    checkpoint = None
+    if args.checkpoint:
+        try:
+            # Si comparten fichero se comparte la conexión para no bloquear SQLite
+            db = cache.conn if cache and cache_path == args.checkpoint else args.checkpoint
+            checkpoint = ScanCheckpoint(db, args.directory, args.follow_symlinks, args.resume, exclude_list)
+        except sqlite3.Error as e:
+            logger.error(f"No se pudo abrir el punto de control '{args.checkpoint}': {e}. Se continúa sin él.")
 
-    if not duplicates:
+    # Los grupos se escriben en el informe y se procesan a medida que se confirman
+    report = DuplicateReport(args.output_file, args.format, args.hash)
+    engine = DedupEngine(args.action, args.keep, args.prefer, args.quarantine_dir, args.dry_run)
+    try:
+        for hash_val, size, paths, links, subgroup in iter_duplicate_groups(
+            args.directory, exclude_dirs=exclude_list, cache=cache, workers=max(1, args.workers),
+            follow_symlinks=args.follow_symlinks, algorithm=args.hash, verify=args.verify,
+            buffer_size=max(1, args.buffer_size) * 1024, checkpoint=checkpoint,
+        ):
+            if report.groups == 0:
+                logger.info(f"Se encontraron archivos duplicados. Guardando resultados en '{args.output_file}'... 📝")
+            report.write_group(hash_val, size, paths, links, subgroup)
+            engine.process_group(size, paths, links)
+        # El escaneo terminó: el recorrido guardado ya no hace falta (los hashes se conservan)
+        if checkpoint:
+            checkpoint.clear()
+    except IOError as e:
+        logger.error(f"Error: No se pudo escribir en el archivo '{args.output_file}': {e} ❌")
+        return
+    finally:
+        report.close()
+        if checkpoint:
+            checkpoint.close()
+        if cache:
+            cache.close()
+
+    if not report.groups:
         logger.success("No se encontraron archivos duplicados. ✅")
     else:
-        logger.info(f"Se encontraron archivos duplicados. Guardando resultados en '{args.output_file}'... 📝")
-        try:
-            with args.output_file.open('w', encoding='utf-8') as f:
-                for hash_val, paths in duplicates.items():
-                    f.write(f"--- Duplicados con hash: {hash_val} ---\n")
-                    for path in paths:
-                        timestamp = datetime.now().isoformat()
-                        f.write(f"{timestamp} | Archivo duplicado: {path}\n")
-                    f.write("\n")
-            logger.success("Resultados guardados con éxito. ✅")
-        except IOError as e:
-            logger.error(f"Error: No se pudo escribir en el archivo '{args.output_file}': {e} ❌")
+        hardlinks = f" (y {report.hardlinks} enlaces duros)" if report.hardlinks else ""
+        logger.success(f"Resultados guardados con éxito: {report.groups} grupos, {report.files} archivos{hardlinks}, "
+                       f"{report.wasted_bytes / 1024 ** 2:.1f} MB desperdiciados. ✅")
+    if args.action != "report":
+        logger.success(engine.summary())
 
 
 if __name__ == "__main__":
@@ -1,30 +1,395 @@
-import csv, json
+import argparse
+import codecs
+import csv
+import datetime
+import hashlib
+import json
+import math
+import os
+import pathlib
+import re
+import sqlite3
+import sys
+import time
 
-# Seguro que hay una forma mejor de hacerlo pero sirve como workaround rápido
-# Guardar el xlsx de Excel en csv utf-8 delimitado por comas
-# en Notepad++ sustituir todos los ; por , y grabar en codificación UTF-( sin BOM
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
 
-csvFilePath= 'RECIN001.csv'
-jsonFilePath= 'RECIN001.json'
-data = {}
+# Convierte el inventario de activos (RECIN001) de CSV o XLSX a JSON fila a fila.
+# Antes había que cargar todo el CSV en un diccionario y volcarlo de una vez con
+# json.dumps(indent=4); ahora cada fila se escribe en cuanto se lee, así que la
+# memoria no depende del tamaño del inventario.
+#
+# Ya no hace falta guardar el xlsx como CSV desde Excel ni cambiar los ; por , en
+# Notepad++: el .xlsx se lee directamente (openpyxl en modo solo lectura, fila a
+# fila) y en los CSV se detectan el separador (, ; tabulador |) y la codificación
+# (UTF-8 con o sin BOM, UTF-16 con BOM o cp1252, la de Excel en Windows).
+#
+# Uso:
+#   python jasondump.py                                   (RECIN001.csv -> RECIN001.json)
+#   python jasondump.py RECIN001.xlsx                     (XLSX -> RECIN001.json)
+#   python jasondump.py inventario.csv -o inventario.jsonl -f jsonl
+#   python jasondump.py inventario.csv -o - -f compact -k DEV_ID
+#
+# Índice SQLite para consultas rápidas (las reimportaciones solo escriben las filas cambiadas):
+#   python jasondump.py RECIN001.xlsx -f sqlite -o RECIN001.db [--prune]
+#   python jasondump.py --db RECIN001.db -w DEV_ID=ICSL01PLC01
+#   python jasondump.py --db RECIN001.db -w "LOC_INSTALACION~Delegación 1" -w "CRIT>=3"
 
-#fieldnames = ('id', 'DEV_ID','DEV_TIPO','DEV_DESCRIPCION','DEV_MARCA','DEV_MODELO','DEV_VERSION','DEV_FIRMWARE','DEV_OS','LOC_INSTALACION','DEV_OWNER_TEC','DEV_OWNER_BUSINESS','DEV_STATUS','DEV_OPERATION','DEV_MAINTENANCE','DEV_NOTAS','IP_MGMNT','CONF','INT','DISP','CRIT')
-#print(fieldnames)
+csvFilePath = 'RECIN001.csv'
+jsonFilePath = 'RECIN001.json'
 
-#import pandas as pd
-#df = pd.read_csv(csvFilePath)
-#print(df)
+# fieldnames = ('id', 'DEV_ID','DEV_TIPO','DEV_DESCRIPCION','DEV_MARCA','DEV_MODELO','DEV_VERSION','DEV_FIRMWARE','DEV_OS',
+#               'LOC_INSTALACION','DEV_OWNER_TEC','DEV_OWNER_BUSINESS','DEV_STATUS','DEV_OPERATION','DEV_MAINTENANCE',
+#               'DEV_NOTAS','IP_MGMNT','CONF','INT','DISP','CRIT')
 
-with open(csvFilePath, 'r', encoding='utf-8') as csvFile:
-    csvReader = csv.DictReader(csvFile)
-    for rows in csvReader:
-        print("ROWS:\t", rows)
-        clave = rows.get('id')
-        print("CLAVE OK", clave)
-        key = rows['id']
-        data[key] = rows
-        print('[', key, ']\t', rows)
+# Columnas numéricas del inventario: confidencialidad, integridad, disponibilidad y criticidad
+NUMERIC_COLUMNS = ('CONF', 'INT', 'DISP', 'CRIT')
 
-with open(jsonFilePath, 'w', encoding='utf-8') as jsonFile:
-    jsonFile.write(json.dumps(data, indent=4))
+# Formatos de salida:
+#   json    objeto {clave: fila} indentado como el RECIN001.json original
+#   compact el mismo objeto en una sola línea, sin espacios
+#   jsonl   una fila JSON por línea, sin clave (para procesarlo en streaming)
+#   sqlite  índice SQLite consultable con --db (ver InventoryIndex)
+FORMATS = ('json', 'compact', 'jsonl', 'sqlite')
 
+
+def to_number(value):
+    # '3' -> 3, '2.5' -> 2.5, '' -> None; lo que no es número se deja como texto.
+    # 'inf', 'nan' o '1e999' también se quedan como texto: float() los acepta, pero
+    # json.dumps los escribiría como Infinity/NaN, que no es JSON válido
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        number = float(value.replace(',', '.'))
+    except ValueError:
+        return value
+    return number if math.isfinite(number) else value
+
+
+# Bytes que se leen del principio del CSV para detectar codificación y separador
+SNIFF_SIZE = 64 * 1024
+
+
+def detect_encoding(sample):
+    # BOM de UTF-8 o UTF-16; si no lo hay, UTF-8 si el texto es válido y si no cp1252
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        # Decodificador incremental: la muestra puede cortar un carácter multibyte al final
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def cp1252_fallback(error):
+    # Manejador de errores de decodificación: los bytes que no son UTF-8 válido se
+    # leen como cp1252 (los cinco bytes que cp1252 no define se sustituyen por U+FFFD)
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    return error.object[error.start:error.end].decode('cp1252', errors='replace'), error.end
+
+
+codecs.register_error('cp1252_fallback', cp1252_fallback)
+
+
+def find_undecodable_line(path, encoding):
+    # Número de la primera línea que no se puede decodificar. Solo se usa al fallar:
+    # el error de lectura llega al decodificar un bloque y no dice en qué línea está
+    decoder = codecs.getincrementaldecoder(encoding)()
+    with open(path, 'rb') as rawFile:
+        for number, line in enumerate(rawFile, 1):
+            try:
+                decoder.decode(line)
+            except UnicodeDecodeError:
+                return number
+    return None
+
+
+# Separadores que puede tener el CSV según cómo se exportó
+DELIMITERS = ',;\t|'
+
+
+def detect_delimiter(text):
+    # El separador es el candidato que más se repite en la cabecera (los nombres de
+    # columna no lo contienen, a diferencia de las notas de texto libre de las filas)
+    header = text.splitlines()[0] if text else ''
+    counts = {delimiter: header.count(delimiter) for delimiter in DELIMITERS}
+    delimiter = max(counts, key=counts.get)
+    return delimiter if counts[delimiter] else ','
+
+
+def iter_csv_rows(path, encoding=None, delimiter=None):
+    # Lee el CSV fila a fila detectando la codificación y el separador si no se indican
+    with open(path, 'rb') as rawFile:
+        sample = rawFile.read(SNIFF_SIZE)
+    # La detección solo ve los primeros SNIFF_SIZE bytes: si un CSV que parecía UTF-8
+    # tiene más adelante bytes de cp1252 (filas pegadas desde Excel), esos bytes se
+    # leen como cp1252 en vez de cortar la conversión a mitad
+    detected = None if encoding else detect_encoding(sample)
+    errors = 'cp1252_fallback' if detected == 'utf-8' else 'strict'
+    encoding = encoding or detected
+    with open(path, 'r', encoding=encoding, errors=errors, newline='') as csvFile:
+        try:
+            if not delimiter:
+                delimiter = detect_delimiter(csvFile.readline())
+                # Al volver al principio el decodificador se reinicia y vuelve a saltar el BOM
+                csvFile.seek(0)
+            yield from csv.DictReader(csvFile, delimiter=delimiter)
+        except UnicodeDecodeError as e:
+            raise ValueError('{}: la línea {} no es texto {} válido ({}); indique la codificación con -e'.format(
+                path, find_undecodable_line(path, encoding), encoding, e.reason)) from e
+
+
+def xlsx_value(value):
+    # Valor de una celda como lo habría exportado Excel a CSV
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_xlsx_rows(path, sheet=None):
+    # Lee la hoja (la activa por defecto) fila a fila sin cargar el libro en memoria
+    if openpyxl is None:
+        raise ImportError('Para leer .xlsx hace falta openpyxl: pip install openpyxl')
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = [xlsx_value(cell) for cell in next(rows, ())]
+        for values in rows:
+            # Las filas vacías del final de la hoja no son dispositivos
+            if all(cell is None for cell in values):
+                continue
+            yield dict(zip(header, (xlsx_value(cell) for cell in values)))
+    finally:
+        workbook.close()
+
+
+def iter_rows(path, numeric=NUMERIC_COLUMNS, encoding=None, delimiter=None, sheet=None):
+    # Lee el inventario (CSV o XLSX según la extensión) fila a fila convirtiendo las columnas numéricas
+    if os.path.splitext(path)[1].lower() in ('.xlsx', '.xlsm'):
+        rows = iter_xlsx_rows(path, sheet)
+    else:
+        rows = iter_csv_rows(path, encoding, delimiter)
+    for row in rows:
+        for column in numeric:
+            if column in row and row[column] is not None:
+                row[column] = to_number(row[column])
+        yield row
+
+
+def write_json(rows, out, key='id', fmt='json'):
+    # Escribe las filas en 'out' según el formato y devuelve cuántas se han escrito.
+    # En los formatos json/compact las claves repetidas se escriben tal cual; al
+    # cargarlo con json.load gana la última, igual que con el diccionario de antes
+    count = 0
+    if fmt == 'jsonl':
+        for row in rows:
+            out.write(json.dumps(row, separators=(',', ':')))
+            out.write('\n')
+            count += 1
+        return count
+
+    out.write('{')
+    for row in rows:
+        if key not in row:
+            raise KeyError("La columna clave '{}' no existe en el CSV".format(key))
+        if fmt == 'compact':
+            out.write('{}{}:{}'.format(',' if count else '', json.dumps(str(row[key])),
+                                       json.dumps(row, separators=(',', ':'))))
+        else:
+            # Misma forma que json.dumps(data, indent=4): la fila se indenta un nivel más
+            out.write('{}\n    {}: {}'.format(',' if count else '', json.dumps(str(row[key])),
+                                              json.dumps(row, indent=4).replace('\n', '\n    ')))
+        count += 1
+    out.write('\n}' if fmt == 'json' and count else '}')
+    return count
+
+
+# Columnas con índice en la base SQLite (las únicas que admite --where)
+INDEXED_COLUMNS = ('DEV_ID', 'IP_MGMNT', 'LOC_INSTALACION', 'CRIT')
+
+# Operadores de --where: igualdad, comparaciones y '~' para "contiene"
+WHERE_PATTERN = re.compile(r'^\s*(\w+)\s*(>=|<=|=|>|<|~)\s*(.*?)\s*$')
+
+
+class InventoryIndex:
+    # Inventario en SQLite: la fila completa se guarda en JSON y las columnas de
+    # búsqueda se copian aparte con su índice, así una consulta por DEV_ID, IP,
+    # ubicación o criticidad es una búsqueda en el índice y no un recorrido del JSON.
+    # Cada fila guarda un hash de su contenido para que al reimportar solo se
+    # escriban las que han cambiado.
+
+    def __init__(self, db_path, read_only=False):
+        # En solo lectura (consultas con --db) no se crea nada ni se cambia el modo del
+        # diario: la base puede estar en un directorio sin permiso de escritura
+        self.read_only = read_only
+        if read_only:
+            self.conn = sqlite3.connect('{}?mode=ro'.format(pathlib.Path(db_path).resolve().as_uri()), uri=True)
+            return
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS devices ('
+            'key TEXT PRIMARY KEY, DEV_ID TEXT, IP_MGMNT TEXT, LOC_INSTALACION TEXT, CRIT, '
+            'row_hash TEXT NOT NULL, row_json TEXT NOT NULL)'
+        )
+        for column in INDEXED_COLUMNS:
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_devices_{0} ON devices ({0})'.format(column))
+
+    def upsert(self, rows, key='id', prune=False):
+        # Inserta las filas nuevas, actualiza las cambiadas y deja intactas las demás.
+        # Con 'prune' se borran las filas que ya no están en el inventario.
+        # Devuelve un diccionario con los contadores de cada caso.
+        stats = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+        with self.conn:
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY)')
+            self.conn.execute('DELETE FROM seen')
+            for row in rows:
+                if key not in row:
+                    raise KeyError("La columna clave '{}' no existe en el CSV".format(key))
+                row_key = str(row[key])
+                # Las columnas se guardan en el orden del fichero de origen
+                row_json = json.dumps(row, separators=(',', ':'))
+                row_hash = hashlib.sha1(row_json.encode('utf-8')).hexdigest()
+                values = [row.get(column) for column in INDEXED_COLUMNS]
+                current = self.conn.execute('SELECT row_hash FROM devices WHERE key = ?', (row_key,)).fetchone()
+                if current is None:
+                    self.conn.execute('INSERT INTO devices VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                      (row_key, *values, row_hash, row_json))
+                    stats['inserted'] += 1
+                elif current[0] != row_hash:
+                    self.conn.execute(
+                        'UPDATE devices SET DEV_ID = ?, IP_MGMNT = ?, LOC_INSTALACION = ?, CRIT = ?, '
+                        'row_hash = ?, row_json = ? WHERE key = ?', (*values, row_hash, row_json, row_key))
+                    stats['updated'] += 1
+                else:
+                    stats['unchanged'] += 1
+                if prune:
+                    self.conn.execute('INSERT OR IGNORE INTO seen VALUES (?)', (row_key,))
+            if prune:
+                stats['deleted'] = self.conn.execute(
+                    'DELETE FROM devices WHERE key NOT IN (SELECT key FROM seen)').rowcount
+        return stats
+
+    def query(self, conditions):
+        # Devuelve las filas que cumplen todas las condiciones (columna, operador, valor)
+        clauses, params = [], []
+        for column, operator, value in conditions:
+            if column not in INDEXED_COLUMNS:
+                raise KeyError("Solo se puede filtrar por {}".format(', '.join(INDEXED_COLUMNS)))
+            if operator == '~':
+                clauses.append('{} LIKE ?'.format(column))
+                params.append('%{}%'.format(value))
+            else:
+                clauses.append('{} {} ?'.format(column, operator))
+                params.append(to_number(value) if column in NUMERIC_COLUMNS else value)
+        sql = 'SELECT row_json FROM devices'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        for (row_json,) in self.conn.execute(sql + ' ORDER BY key', params):
+            yield json.loads(row_json)
+
+    def close(self):
+        # WAL solo durante la importación: una base en modo WAL necesita crear el fichero
+        # -shm incluso para leerla, y eso falla a quien solo tiene permiso de lectura
+        if not self.read_only:
+            try:
+                self.conn.execute('PRAGMA journal_mode=DELETE')
+            except sqlite3.OperationalError:
+                # Otra conexión la tiene abierta; se queda en WAL hasta la próxima importación
+                pass
+        self.conn.close()
+
+
+def parse_where(text):
+    # 'CRIT>=3' -> ('CRIT', '>=', '3')
+    match = WHERE_PATTERN.match(text)
+    if not match:
+        raise argparse.ArgumentTypeError("condición no válida '{}': se espera COLUMNA=valor, >=, <=, >, < o ~".format(text))
+    return match.groups()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convierte un inventario CSV o XLSX a JSON o JSONL fila a fila.')
+    parser.add_argument('input', nargs='?', default=csvFilePath, help='CSV o XLSX de entrada (por defecto: %(default)s)')
+    parser.add_argument('-o', '--output', default=jsonFilePath, help="Fichero de salida o '-' para la consola (por defecto: %(default)s)")
+    parser.add_argument('-k', '--key', default='id', help='Columna que se usa como clave del objeto JSON (por defecto: %(default)s)')
+    parser.add_argument('-f', '--format', choices=FORMATS, default='json', help='Formato de salida (por defecto: %(default)s)')
+    parser.add_argument('-n', '--numeric', default=','.join(NUMERIC_COLUMNS),
+                        help="Columnas numéricas separadas por comas, '' para ninguna (por defecto: %(default)s)")
+    parser.add_argument('-e', '--encoding', help='Codificación del CSV (por defecto: detectada; UTF-8, UTF-16 o cp1252)')
+    parser.add_argument('-d', '--delimiter', help='Separador del CSV (por defecto: detectado entre , ; tabulador |)')
+    parser.add_argument('-s', '--sheet', help='Hoja del XLSX (por defecto: la activa)')
+    parser.add_argument('--prune', action='store_true', help='Con -f sqlite, borra los dispositivos que ya no están en la entrada')
+    parser.add_argument('--db', help='Consulta esta base SQLite (creada con -f sqlite) en vez de convertir')
+    parser.add_argument('-w', '--where', type=parse_where, action='append', default=[],
+                        help='Condición de la consulta, p. ej. DEV_ID=ICSL01PLC01, CRIT>=3 o '
+                             '"LOC_INSTALACION~Delegación"; se puede repetir')
+    args = parser.parse_args()
+
+    # Modo consulta: filas en JSONL por la consola
+    if args.db:
+        if not os.path.exists(args.db):
+            parser.error('No existe la base de datos {}'.format(args.db))
+        start = time.perf_counter()
+        count = 0
+        try:
+            index = InventoryIndex(args.db, read_only=True)
+        except sqlite3.Error as e:
+            parser.error('No se puede abrir la base de datos {}: {}'.format(args.db, e))
+        try:
+            for row in index.query(args.where):
+                print(json.dumps(row, ensure_ascii=False))
+                count += 1
+        except KeyError as e:
+            parser.error(e.args[0])
+        except sqlite3.Error as e:
+            parser.error('No se puede consultar {} (¿creada con -f sqlite?): {}'.format(args.db, e))
+        finally:
+            index.close()
+        print('{} filas en {:.1f} ms'.format(count, (time.perf_counter() - start) * 1000), file=sys.stderr)
+        return
+
+    numeric = tuple(column.strip() for column in args.numeric.split(',') if column.strip())
+    # En la consola es más cómodo escribir '\t' que un tabulador real
+    delimiter = '\t' if args.delimiter == '\\t' else args.delimiter
+    rows = iter_rows(args.input, numeric, args.encoding, delimiter, args.sheet)
+    try:
+        if args.format == 'sqlite':
+            output = jsonFilePath[:-len('.json')] + '.db' if args.output == jsonFilePath else args.output
+            index = InventoryIndex(output)
+            try:
+                stats = index.upsert(rows, args.key, args.prune)
+            finally:
+                index.close()
+            print('{} nuevas, {} actualizadas, {} sin cambios, {} borradas en {}'.format(
+                stats['inserted'], stats['updated'], stats['unchanged'], stats['deleted'], output), file=sys.stderr)
+            return
+        if args.output == '-':
+            count = write_json(rows, sys.stdout, args.key, args.format)
+        else:
+            with open(args.output, 'w', encoding='utf-8') as jsonFile:
+                count = write_json(rows, jsonFile, args.key, args.format)
+    except (KeyError, ImportError, ValueError) as e:
+        parser.error(e.args[0])
+    print('{} filas convertidas de {} a {}'.format(count, args.input, args.output), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,24 +2,128 @@
 # Mezcla en un único fichero el resultado de los ficheros generados por pdf_splitter.py en varios ficheros comenzando en nombre_page_001.pdf hasta la última página
 # Basado en los scripts del siguiente enlace
 #  https://www.blog.pythonlibrary.org/2018/06/07/an-intro-to-pypdf2/
+#
+# Usa la API actual de pypdf a través de pdf_pages.py. Cada entrada se lee cuando
+# se llega a ella y sus páginas se copian al escritor, de modo que no hay ficheros
+# abiertos entre una entrada y otra. Cada 'dedup_every' páginas se fusionan los
+# objetos idénticos (fuentes e imágenes que cada página separada lleva repetidas),
+# así lo repetido se guarda una sola vez. La memoria no está acotada: pypdf guarda
+# todas las páginas hasta escribir el fichero al final y crece con el contenido
+# distinto, que en documentos sin recursos compartidos es casi todo el documento.
+#
+# Uso:
+#   python pdf_merger.py -o Fichero_completo.pdf "revista_ejercito_julio_952_*.pdf"
+#   python pdf_merger.py --benchmark 3000
 
 import os
+import re
+import sys
 import glob
-from PyPDF2 import PdfFileWriter, PdfFileReader
-
-def merger(output_path, input_paths):
-    pdf_writer = PdfFileWriter()
-            
-    for path in input_paths:
-        pdf_reader = PdfFileReader(path)
-        for page in range(pdf_reader.getNumPages()):
-            pdf_writer.addPage(pdf_reader.getPage(page))
-        
-    with open(output_path, 'wb') as fh:
-        pdf_writer.write(fh)
-        
-        
+import time
+import argparse
+import tempfile
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject, ArrayObject
+from pdf_pages import DEDUP_EVERY, iter_pages, write_pages
+
+
+def natural_key(path):
+    # Ordena 'x_page_2.pdf' antes que 'x_page_10.pdf' (y 'x_page_999' antes que 'x_page_1000')
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', path)]
+
+
+def expand_inputs(patterns):
+    # Expande los patrones glob y devuelve las rutas sin repetir en orden natural
+    paths = set()
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            paths.update(glob.glob(pattern))
+        else:
+            paths.add(pattern)
+    return sorted(paths, key=natural_key)
+
+
+def merger(output_path, input_paths, dedup=True, dedup_every=DEDUP_EVERY):
+    # Una sola pasada: las páginas de cada entrada van directamente al PDF de salida
+    return write_pages(iter_pages(input_paths), output_path, dedup=dedup, dedup_every=dedup_every)
+
+
+def _sample_page(page_number, image_side=64):
+    # Genera un PDF de una página con una fuente y una imagen iguales en todas las muestras,
+    # como las que deja pdf_splitter.py al separar una revista
+    pdf_writer = PdfWriter()
+    page = pdf_writer.add_blank_page(595, 842)
+
+    image = DecodedStreamObject()
+    image.set_data(bytes((x * y) % 256 for y in range(image_side) for x in range(image_side)) * 3)
+    image.update({
+        NameObject('/Type'): NameObject('/XObject'),
+        NameObject('/Subtype'): NameObject('/Image'),
+        NameObject('/Width'): NumberObject(image_side),
+        NameObject('/Height'): NumberObject(image_side * 3),
+        NameObject('/ColorSpace'): NameObject('/DeviceGray'),
+        NameObject('/BitsPerComponent'): NumberObject(8),
+    })
+    font = DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+    })
+    content = DecodedStreamObject()
+    content.set_data('BT /F1 24 Tf 72 760 Td (Pagina {}) Tj ET q 200 0 0 600 72 100 cm /Im0 Do Q'.format(
+        page_number).encode('ascii'))
+
+    page[NameObject('/Resources')] = DictionaryObject({
+        NameObject('/Font'): DictionaryObject({NameObject('/F1'): pdf_writer._add_object(font)}),
+        NameObject('/XObject'): DictionaryObject({NameObject('/Im0'): pdf_writer._add_object(image)}),
+        NameObject('/ProcSet'): ArrayObject([NameObject('/PDF'), NameObject('/Text'), NameObject('/ImageB')]),
+    })
+    page[NameObject('/Contents')] = pdf_writer._add_object(content)
+    return pdf_writer
+
+
+def benchmark(pages=3000):
+    # Genera 'pages' ficheros de una página con nombres sin ceros a la izquierda y los mezcla
+    # con y sin deduplicación, midiendo el tiempo y el tamaño del resultado
+    with tempfile.TemporaryDirectory() as tmp:
+        print('Generando {} ficheros de una página en {}'.format(pages, tmp))
+        for number in range(1, pages + 1):
+            with open(os.path.join(tmp, 'muestra_page_{}.pdf'.format(number)), 'wb') as fh:
+                _sample_page(number).write(fh)
+        paths = expand_inputs([os.path.join(tmp, 'muestra_page_*.pdf')])
+        assert os.path.basename(paths[9]) == 'muestra_page_10.pdf'
+
+        for dedup in (False, True):
+            output_path = os.path.join(tmp, 'completo_{}.pdf'.format('dedup' if dedup else 'sin_dedup'))
+            start = time.perf_counter()
+            merged = merger(output_path, paths, dedup=dedup)
+            elapsed = time.perf_counter() - start
+            print('{:<12} {:6d} páginas  {:7.2f} s  {:8.1f} páginas/s  {:8.1f} KB'.format(
+                'dedup' if dedup else 'sin dedup', merged, elapsed, merged / elapsed,
+                os.path.getsize(output_path) / 1024))
+
+
 if __name__ == '__main__':
-    paths = glob.glob('revista_ejercito_julio_952_*.pdf')
-    paths.sort()
-    merger('Fichero_completo.pdf', paths)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Mezcla varios PDF en un único fichero en orden natural.')
+    parser.add_argument('inputs', nargs='*', default=['revista_ejercito_julio_952_*.pdf'],
+                        help='Ficheros o patrones glob a mezclar (por defecto: revista_ejercito_julio_952_*.pdf)')
+    parser.add_argument('-o', '--output', default='Fichero_completo.pdf', help='PDF de salida')
+    parser.add_argument('--no-dedup', action='store_true', help='No fusiona fuentes e imágenes idénticas')
+    parser.add_argument('--dedup-every', type=int, default=DEDUP_EVERY,
+                        help='Páginas entre dos fusiones de objetos idénticos (por defecto: {})'.format(DEDUP_EVERY))
+    parser.add_argument('--benchmark', type=int, nargs='?', const=3000, metavar='PAGINAS',
+                        help='Genera PAGINAS ficheros de prueba (por defecto 3000), los mezcla y sale')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        sys.exit(0)
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        parser.error('No hay ficheros que mezclar')
+    start = time.perf_counter()
+    pages = merger(args.output, paths, dedup=not args.no_dedup, dedup_every=max(1, args.dedup_every))
+    elapsed = time.perf_counter() - start
+    print('Mezcladas {} páginas de {} ficheros en {} ({:.2f} s, {:.1f} páginas/s)'.format(
+        pages, len(paths), args.output, elapsed, pages / elapsed if elapsed else 0.0))
@@ -0,0 +1,117 @@
+# pdf_pages.py
+# Flujo de páginas en memoria para reorganizar PDF sin ficheros intermedios.
+#
+# En lugar de separar un documento en N ficheros con pdf_splitter.py y volver a
+# juntarlos con pdf_merger.py, las páginas de uno o varios PDF se recorren de forma
+# perezosa, se filtran, reordenan o giran, y se escriben en un único fichero: una
+# lectura y una escritura en vez de 2N ficheros.
+#
+# Ejemplo:
+#   from pdf_pages import iter_pages, filter_pages, rotate_pages, write_pages
+#   pages = iter_pages(['revista.pdf', 'anexo.pdf'], ranges='1-10,20-')
+#   pages = filter_pages(pages, lambda p: p.number != 3)
+#   pages = rotate_pages(pages, 90, lambda p: p.source == 'anexo.pdf')
+#   write_pages(pages, 'resultado.pdf')
+#
+# Uso desde consola:
+#   python pdf_pages.py -o resultado.pdf revista.pdf anexo.pdf -r "1-10,20-" --rotate 90 --reverse
+
+import argparse
+from typing import NamedTuple
+from pypdf import PdfReader, PdfWriter
+from pypdf import PageObject
+from pdf_splitter import parse_ranges
+
+# Cada cuántas páginas escritas se fusionan los objetos idénticos
+DEDUP_EVERY = 200
+
+
+class Page(NamedTuple):
+    # Página de un documento de origen: fichero, número (desde 1) y objeto pypdf
+    source: str
+    number: int
+    page: PageObject
+
+
+def iter_pages(paths, ranges=None):
+    # Devuelve las páginas de los PDF en orden. Cada documento se abre solo cuando
+    # se llega a él, y 'ranges' ("1-10,15,20-") se aplica a cada uno de ellos
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        reader = PdfReader(path)
+        for start, end in parse_ranges(ranges, len(reader.pages)):
+            for index in range(start, end):
+                yield Page(path, index + 1, reader.pages[index])
+
+
+def filter_pages(pages, predicate):
+    # Deja pasar solo las páginas para las que predicate(page) es verdadero
+    return (page for page in pages if predicate(page))
+
+
+def reorder_pages(pages, key=None, reverse=False):
+    # Reordena las páginas por 'key' (o solo invierte el orden). Necesita recorrer
+    # todas las páginas antes de entregar la primera, pero solo guarda referencias
+    pages = list(pages)
+    if key is not None:
+        pages.sort(key=key, reverse=reverse)
+    elif reverse:
+        pages.reverse()
+    return iter(pages)
+
+
+def rotate_pages(pages, degrees, predicate=None):
+    # Gira en sentido horario (múltiplos de 90) las páginas que cumplen 'predicate'
+    # o todas si no se indica
+    for page in pages:
+        if predicate is None or predicate(page):
+            page.page.rotate(degrees)
+        yield page
+
+
+def write_pages(pages, output_path, dedup=True, dedup_every=DEDUP_EVERY):
+    # Escribe las páginas en un único PDF y devuelve cuántas se han escrito. Con
+    # 'dedup' se fusionan periódicamente las fuentes e imágenes idénticas.
+    # pypdf no escribe por partes: todas las páginas siguen en el PdfWriter hasta
+    # write() al final, así que la memoria no está acotada. La fusión solo evita
+    # guardar varias copias de lo repetido; con contenido casi todo distinto, la
+    # memoria crece con el tamaño del documento de salida
+    pdf_writer = PdfWriter()
+    count = 0
+    for page in pages:
+        pdf_writer.add_page(page.page)
+        count += 1
+        if dedup and count % dedup_every == 0:
+            pdf_writer.compress_identical_objects()
+            # La fusión renumera objetos, así que se olvidan las traducciones de objetos
+            # ya copiados (si vuelven a aparecer se copian y la siguiente fusión los une).
+            # Además el escritor suelta así su referencia a los lectores ya terminados
+            pdf_writer.reset_translation()
+    if dedup:
+        pdf_writer.compress_identical_objects()
+    with open(output_path, 'wb') as fh:
+        pdf_writer.write(fh)
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Selecciona, gira y reordena páginas de varios PDF en un único fichero.')
+    parser.add_argument('inputs', nargs='+', help='PDF de origen, en orden')
+    parser.add_argument('-o', '--output', required=True, help='PDF de salida')
+    parser.add_argument('-r', '--ranges', help='Páginas de cada documento, p. ej. "1-10,15,20-" (por defecto: todas)')
+    parser.add_argument('--rotate', type=int, default=0, help='Grados de giro horario (múltiplo de 90)')
+    parser.add_argument('--reverse', action='store_true', help='Invierte el orden de las páginas')
+    args = parser.parse_args()
+
+    if args.rotate % 90:
+        parser.error('El giro debe ser múltiplo de 90 grados')
+    try:
+        pages = iter_pages(args.inputs, args.ranges)
+        if args.reverse:
+            pages = reorder_pages(pages, reverse=True)
+        if args.rotate:
+            pages = rotate_pages(pages, args.rotate)
+        print('Escritas {} páginas en {}'.format(write_pages(pages, args.output), args.output))
+    except ValueError as e:
+        parser.error(str(e))
@@ -5,9 +5,15 @@
 
 """
 This script divides a PDF file into multiple numbered files starting with
-"basename_page_001.pdf" and increments until the last page.
+"basename_page_001.pdf" and increments until the last page. Files holding
+several pages are named after their first and last page with the same prefix
+("basename_page_001-010.pdf"), so pdf_merger.py sorts them back in page order.
 
-Based on scripts from 
+Page ranges ("1-10,15,20-") and chunk sizes can be used to write several
+pages per file, and the output files are written by a pool of worker
+processes that share a single parse of the source document.
+
+Based on scripts from
   https://www.blog.pythonlibrary.org/2018/06/07/an-intro-to-pypdf2/
 """
 
@@ -16,10 +22,24 @@ Based on scripts from
 * 2023-09-22: Initial release.
 * 2023-12-17: Migrated from PyPDF to pypdf
 * 2023-12-17: Added changelog.
+* 2026-10-18: Page ranges, chunk sizes, parallel writing and pages/second report.
 """
 
 # What's New
 """
+## 2026-10-18
+* The source PDF is parsed once and output files are written by a process pool
+  (`--workers`). On fork-based platforms the workers inherit the parsed reader;
+  elsewhere each worker parses it once, never once per output file.
+* `--ranges "1-10,15,20-"` selects the pages to extract, one output file per range.
+* `--chunk N` splits every range into files of N pages (default: 1, one page per file).
+* Filenames are zero-padded to the number of digits of the last page (minimum 3),
+  so pdf_merger.py keeps the right order past page 999.
+* Multi-page files use the same `_page_` prefix as single pages
+  (`basename_page_001-002.pdf`), so single and multi-page files interleave in page
+  order when merged.
+* A pages/second summary is printed at the end.
+
 ## 2023-03-08
 * Obsoleted PyPDF2 library has been replaced by pypdf
   https://pypi.org/project/PyPDF2/
@@ -35,54 +55,174 @@ Based on scripts from
 """
 
 # Script Information
-fecha_actualizacion = "2023-12-17"
+fecha_actualizacion = "2026-10-18"
 
 # Imported Libraries
 # ------------------
+import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pypdf import PdfReader, PdfWriter
 """
   Requires pip install pypdf[crypto] or pip install pypdf[full]
 """
 
+# Reader shared by the worker processes (inherited on fork, parsed once per worker otherwise)
+_reader = None
+_reader_path = None
+
+
+def parse_ranges(spec, page_count):
+    """
+    This function converts a page range specification into 0-based page ranges.
 
+    Args:
+        spec: Comma separated 1-based ranges such as "1-10,15,20-" ("-5" means 1-5
+            and "20-" means 20 to the last page). None or "" selects every page.
+        page_count: Number of pages of the document.
 
-def pdf_splitter(path):
+    Returns:
+        List of (start, end) tuples, end exclusive, in the order given.
+    """
+    if not spec:
+        return [(0, page_count)]
+    ranges = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        first, dash, last = item.partition('-')
+        try:
+            start = int(first) if first else 1
+            end = (int(last) if last else page_count) if dash else start
+        except ValueError:
+            raise ValueError('Invalid page range: {}'.format(item))
+        if not 1 <= start <= end <= page_count:
+            raise ValueError('Page range {} is outside 1-{}'.format(item, page_count))
+        ranges.append((start - 1, end))
+    if not ranges:
+        raise ValueError('Empty page range specification: {}'.format(spec))
+    return ranges
+
+
+def plan_parts(ranges, chunk, fname, page_count, output_dir='.'):
+    """
+    This function splits the page ranges into output files of at most `chunk` pages.
+
+    Args:
+        ranges: List of (start, end) 0-based ranges, end exclusive.
+        chunk: Maximum number of pages per output file (0 writes each range whole).
+        fname: Base name of the output files.
+        page_count: Number of pages of the document (sets the zero padding).
+        output_dir: Directory for the output files.
+
+    Returns:
+        List of (start, end, output_path) tuples.
+    """
+    width = max(3, len(str(page_count)))
+    parts = []
+    for start, end in ranges:
+        step = chunk if chunk > 0 else end - start
+        for first in range(start, end, step):
+            last = min(first + step, end)
+            if last - first == 1:
+                name = '{}_page_{:0{w}d}.pdf'.format(fname, first + 1, w=width)
+            else:
+                name = '{}_page_{:0{w}d}-{:0{w}d}.pdf'.format(fname, first + 1, last, w=width)
+            parts.append((first, last, os.path.join(output_dir, name)))
+    return parts
+
+
+def _load_reader(path):
+    """Opens the source PDF in this process unless it was already inherited from the parent."""
+    global _reader, _reader_path
+    if _reader is None or _reader_path != path:
+        _reader = PdfReader(path)
+        _reader_path = path
+
+
+def _write_part(start, end, output_path):
+    """Writes pages start..end-1 of the shared reader to output_path and returns the page count."""
+    pdf_writer = PdfWriter()
+    for page in range(start, end):
+        pdf_writer.add_page(_reader.pages[page])
+    with open(output_path, 'wb') as out:
+        pdf_writer.write(out)
+    return end - start
+
+
+def _write_parts(parts):
+    """Writes a batch of parts in a worker process and returns the total page count."""
+    return sum(_write_part(*part) for part in parts)
+
+
+def pdf_splitter(path, ranges=None, chunk=1, workers=1, output_dir='.'):
     """
     This function takes a PDF file path and splits it into multiple page-numbered PDFs.
 
     Args:
         path: Path to the input PDF file.
+        ranges: Optional page range specification such as "1-10,15,20-".
+        chunk: Pages per output file; 0 writes each range as a single file.
+        workers: Number of worker processes writing output files.
+        output_dir: Directory for the output files.
+
+    Returns:
+        List of the created file names.
     """
+    start_time = time.perf_counter()
 
  # Extract filename and extension
     fname = os.path.splitext(os.path.basename(path))[0]
 
-# Open PDF document and read pages
-    reader = PdfReader(path)
-
-# Iterate through each page  
-    for page in range(len(reader.pages)):
-        # Create PdfWriter object
-        pdf_writer = PdfWriter()
-
-        #Add page to the output file
-        pdf_writer.add_page(reader.pages[page])
-
-        # Generate output filename based on page number
-        if page < 9:
-            output_filename = '{}_page_00{}.pdf'.format(fname, page+1)
-        elif page >= 99:
-            output_filename = '{}_page_{}.pdf'.format(fname, page+1)
-        else:
-            output_filename = '{}_page_0{}.pdf'.format(fname, page+1)
-        with open(output_filename, 'wb') as out:
-            # Write output file
-            pdf_writer.write(out)
-        # Print file creation message   
-        print('Created: {}'.format(output_filename))
+# Open PDF document once; workers started by fork inherit it already parsed
+    _load_reader(path)
+    page_count = len(_reader.pages)
+    parts = plan_parts(parse_ranges(ranges, page_count), chunk, fname, page_count, output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+# Write every part, in parallel when more than one worker is requested
+    created = []
+    pages_written = 0
+    if workers > 1 and len(parts) > 1:
+        # Parts are sent in batches: one task per page would spend more time in
+        # inter-process messages than writing the small one-page files
+        batch_size = max(1, len(parts) // (workers * 4))
+        batches = [parts[i:i + batch_size] for i in range(0, len(parts), batch_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_load_reader, initargs=(path,)) as pool:
+            # Futures are consumed in submission order so the messages follow the page order
+            futures = [(batch, pool.submit(_write_parts, batch)) for batch in batches]
+            for batch, future in futures:
+                pages_written += future.result()
+                for first, last, output_filename in batch:
+                    created.append(output_filename)
+                    print('Created: {}'.format(output_filename))
+    else:
+        for first, last, output_filename in parts:
+            pages_written += _write_part(first, last, output_filename)
+            created.append(output_filename)
+            # Print file creation message
+            print('Created: {}'.format(output_filename))
+
+# Report throughput
+    elapsed = time.perf_counter() - start_time
+    print('Split {} pages into {} files in {:.2f} s ({:.1f} pages/s)'.format(
+        pages_written, len(created), elapsed, pages_written / elapsed if elapsed else 0.0))
+    return created
 
 
 if __name__ == '__main__':
-    path = 'revistasic157.pdf'
-    pdf_splitter(path)
+    parser = argparse.ArgumentParser(description='Split a PDF file into page-numbered PDF files.')
+    parser.add_argument('path', nargs='?', default='revistasic157.pdf', help='PDF file to split')
+    parser.add_argument('-r', '--ranges', help='Pages to extract, e.g. "1-10,15,20-" (default: all pages)')
+    parser.add_argument('-c', '--chunk', type=int, default=1,
+                        help='Pages per output file; 0 writes each range as one file (default: 1)')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes writing output files (default: number of CPUs)')
+    parser.add_argument('-o', '--output-dir', default='.', help='Directory for the output files (default: .)')
+    args = parser.parse_args()
+    try:
+        pdf_splitter(args.path, args.ranges, args.chunk, args.workers, args.output_dir)
+    except ValueError as e:
+        parser.error(str(e))
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas del motor de acciones y de la agrupación de enlaces duros de
+find_duplicate_files_by_hash.py. Se ejecutan con: pytest
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import find_duplicate_files_by_hash as fd
+
+CONTENT = b"contenido duplicado\n" * 4096
+
+
+def make_files(base: Path, names: list[str], content: bytes = CONTENT) -> list[str]:
+    """Crea archivos con el mismo contenido y devuelve sus rutas."""
+    paths = []
+    for name in names:
+        path = base / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        paths.append(str(path))
+    return paths
+
+
+def set_mtime(path: str, seconds: int) -> None:
+    os.utime(path, (seconds, seconds))
+
+
+def inode(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_dev, st.st_ino
+
+
+# Exclusiones
+
+def test_bare_name_excludes_at_any_depth(tmp_path):
+    matcher = fd.ExclusionMatcher(["node_modules"], tmp_path)
+    nested = tmp_path / "data" / "node_modules"
+
+    assert matcher.matches(str(nested), nested.name)
+    assert not matcher.matches(str(tmp_path / "data" / "src"), "src")
+
+
+def test_relative_glob_with_separator_is_anchored_at_root(tmp_path):
+    make_files(tmp_path / "data", ["build/a.o", "build/sub/b.o", "src/c.o", "src/d.o"])
+
+    groups = list(fd.iter_duplicate_groups(tmp_path / "data", exclude_dirs=["build/*.o"]))
+
+    assert [sorted(Path(p).name for p in paths) for _, _, paths, _, _ in groups] == [["c.o", "d.o"]]
+
+
+# Puntos de control (--checkpoint, --resume)
+
+def test_checkpoint_with_other_exclusions_is_not_resumed(tmp_path):
+    db = tmp_path / "estado.db"
+    checkpoint = fd.ScanCheckpoint(db, tmp_path, exclusions=["build"])
+    checkpoint.save([("sub", str(tmp_path / "sub"))], [], force=True)
+    checkpoint.close()
+
+    same = fd.ScanCheckpoint(db, tmp_path, resume=True, exclusions=["build"])
+    assert same.resuming
+    same.close()
+    other = fd.ScanCheckpoint(db, tmp_path, resume=True, exclusions=["build", "*.tmp"])
+    assert not other.resuming
+    other.close()
+
+
+def test_hash_cache_commits_after_time_interval(tmp_path, monkeypatch):
+    path = make_files(tmp_path, ["a.bin"])[0]
+    st = os.stat(path)
+    cache = fd.HashCache(tmp_path / "cache.db")
+    monkeypatch.setattr(cache, "COMMIT_SECONDS", 0)
+
+    cache.put(path, fd.FileStat(st.st_size, st.st_dev, st.st_ino, st.st_mtime_ns), "full_hash", "abc")
+
+    assert not cache.conn.in_transaction
+    cache.close()
+
+
+# Política de conservación (--keep, --prefer)
+
+@pytest.mark.parametrize("keep, expected", [("oldest", 0), ("newest", 2), ("shortest", 1)])
+def test_choose_original_keep_policy(tmp_path, keep, expected):
+    paths = make_files(tmp_path, ["sub/medio.bin", "c.bin", "sub/dir/reciente.bin"])
+    for seconds, path in zip((1000, 2000, 3000), paths):
+        set_mtime(path, seconds)
+
+    original, duplicates = fd.DedupEngine("delete", keep=keep).choose_original(paths)
+
+    assert original == paths[expected]
+    assert sorted(duplicates) == sorted(p for p in paths if p != original)
+
+
+def test_choose_original_prefer_overrides_keep(tmp_path):
+    paths = make_files(tmp_path, ["viejo.bin", "fotos/nuevo.bin"])
+    set_mtime(paths[0], 1000)
+    set_mtime(paths[1], 2000)
+
+    engine = fd.DedupEngine("delete", keep="oldest", prefer=[tmp_path / "fotos"])
+
+    assert engine.choose_original(paths) == (paths[1], [paths[0]])
+
+
+def test_choose_original_prefer_counts_hardlinks(tmp_path):
+    paths = make_files(tmp_path, ["viejo.bin", "nuevo.bin"])
+    set_mtime(paths[0], 1000)
+    set_mtime(paths[1], 2000)
+    (tmp_path / "fotos").mkdir()
+    alias = str(tmp_path / "fotos" / "nuevo.bin")
+    os.link(paths[1], alias)
+
+    engine = fd.DedupEngine("delete", keep="oldest", prefer=[tmp_path / "fotos"])
+
+    assert engine.choose_original(paths, {paths[1]: [alias]})[0] == paths[1]
+
+
+def test_prefer_does_not_match_sibling_prefix(tmp_path):
+    paths = make_files(tmp_path, ["a.bin", "fotos2/b.bin"])
+    set_mtime(paths[0], 1000)
+    set_mtime(paths[1], 2000)
+
+    engine = fd.DedupEngine("delete", keep="oldest", prefer=[tmp_path / "fotos"])
+
+    assert engine.choose_original(paths)[0] == paths[0]
+
+
+# Simulación (--dry-run)
+
+@pytest.mark.parametrize("action", ["hardlink", "quarantine", "delete"])
+def test_dry_run_does_not_modify_files(tmp_path, action):
+    paths = make_files(tmp_path / "datos", ["a.bin", "b.bin", "c.bin"])
+    before = {path: inode(path) for path in paths}
+    quarantine = tmp_path / "cuarentena"
+
+    engine = fd.DedupEngine(action, quarantine_dir=quarantine, dry_run=True)
+    engine.process_group(len(CONTENT), paths)
+
+    assert {path: inode(path) for path in paths} == before
+    assert not quarantine.exists()
+    assert engine.replaced == 2
+    assert engine.reclaimed_bytes == 2 * len(CONTENT)
+    assert "simulación" in engine.summary()
+
+
+# Sustitución atómica (--action hardlink)
+
+def test_hardlink_replaces_duplicates(tmp_path):
+    paths = make_files(tmp_path, ["a.bin", "b.bin"])
+    set_mtime(paths[0], 1000)
+
+    engine = fd.DedupEngine("hardlink")
+    engine.process_group(len(CONTENT), paths)
+
+    assert inode(paths[0]) == inode(paths[1])
+    assert Path(paths[1]).read_bytes() == CONTENT
+    assert engine.reclaimed_bytes == len(CONTENT)
+    assert sorted(os.listdir(tmp_path)) == ["a.bin", "b.bin"]
+
+
+def test_replace_keeps_existing_file_with_temp_name(tmp_path):
+    paths = make_files(tmp_path, ["a.bin", "b.bin"])
+    set_mtime(paths[0], 1000)
+    user_file = tmp_path / ".b.bin.dedup.tmp"
+    user_file.write_text("USER DATA")
+
+    fd.DedupEngine("hardlink").process_group(len(CONTENT), paths)
+
+    assert user_file.read_text() == "USER DATA"
+    assert inode(paths[0]) == inode(paths[1])
+
+
+def test_replace_retries_taken_temp_names(tmp_path, monkeypatch):
+    paths = make_files(tmp_path, ["a.bin", "b.bin"])
+    taken = tmp_path / ".b.bin.ocupado.dedup.tmp"
+    taken.write_text("USER DATA")
+    names = iter(["ocupado", "libre"])
+    monkeypatch.setattr(fd.secrets, "token_hex", lambda n: next(names))
+
+    fd.DedupEngine("hardlink")._replace(paths[0], paths[1])
+
+    assert taken.read_text() == "USER DATA"
+    assert inode(paths[0]) == inode(paths[1])
+    assert not (tmp_path / ".b.bin.libre.dedup.tmp").exists()
+
+
+def test_failed_replace_leaves_duplicate_untouched(tmp_path, monkeypatch):
+    paths = make_files(tmp_path, ["a.bin", "b.bin"])
+    set_mtime(paths[0], 1000)
+    before = inode(paths[1])
+
+    def failing_replace(src, dst):
+        raise OSError("fallo simulado")
+
+    monkeypatch.setattr(fd.os, "replace", failing_replace)
+    engine = fd.DedupEngine("hardlink")
+    engine.process_group(len(CONTENT), paths)
+
+    assert inode(paths[1]) == before
+    assert Path(paths[1]).read_bytes() == CONTENT
+    assert sorted(os.listdir(tmp_path)) == ["a.bin", "b.bin"]
+    assert (engine.replaced, engine.failed, engine.reclaimed_bytes) == (0, 1, 0)
+
+
+def test_changed_duplicate_is_skipped(tmp_path):
+    paths = make_files(tmp_path, ["a.bin", "b.bin"])
+    set_mtime(paths[0], 1000)
+    Path(paths[1]).write_bytes(CONTENT + b"cambio")
+
+    engine = fd.DedupEngine("delete")
+    engine.process_group(len(CONTENT), paths)
+
+    assert os.path.exists(paths[1])
+    assert engine.failed == 1
+
+
+# Verificación (--verify)
+
+def test_verification_split_keeps_real_hash(tmp_path, monkeypatch):
+    make_files(tmp_path, ["a1.bin", "a2.bin"], b"A" * 64)
+    make_files(tmp_path, ["b1.bin", "b2.bin"], b"B" * 64)
+    monkeypatch.setattr(fd, "calculate_hash", lambda *args, **kwargs: "colision")
+
+    groups = list(fd.iter_duplicate_groups(tmp_path, verify="bytes"))
+
+    assert sorted((hash_val, subgroup) for hash_val, _, _, _, subgroup in groups) == \
+        [("colision", 0), ("colision", 1)]
+    report = fd.DuplicateReport(tmp_path / "informe.jsonl", "jsonl")
+    for group in groups:
+        report.write_group(*group)
+    report.close()
+    records = [json.loads(line) for line in (tmp_path / "informe.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [(r["hash"], r["subgroup"], r["count"]) for r in records] == [("colision", 0, 2), ("colision", 1, 2)]
+
+
+# Enlaces duros
+
+def test_hardlinks_are_not_duplicates(tmp_path):
+    paths = make_files(tmp_path, ["a.bin", "b.bin", "c.bin"])
+    set_mtime(paths[0], 1000)
+    fd.DedupEngine("hardlink").process_group(len(CONTENT), paths)
+
+    assert list(fd.iter_duplicate_groups(tmp_path)) == []
+
+
+def test_hardlinks_are_listed_but_counted_once(tmp_path):
+    paths = make_files(tmp_path, ["a.bin", "b.bin"])
+    alias = str(tmp_path / "a_enlace.bin")
+    os.link(paths[0], alias)
+
+    groups = list(fd.iter_duplicate_groups(tmp_path))
+
+    assert len(groups) == 1
+    _, size, group_paths, links, _ = groups[0]
+    assert size == len(CONTENT)
+    assert len(group_paths) == 2
+    assert [sorted([path, *links.get(path, [])]) for path in group_paths if path in links] == \
+        [sorted([paths[0], alias])]
+
+    report = fd.DuplicateReport(tmp_path / "informe.csv", "csv")
+    report.write_group(*groups[0])
+    report.close()
+    assert (report.files, report.hardlinks, report.wasted_bytes) == (2, 1, len(CONTENT))
+
+
+def test_delete_removes_every_link_of_a_duplicate(tmp_path):
+    paths = make_files(tmp_path, ["a.bin", "b.bin"])
+    set_mtime(paths[0], 1000)
+    alias = str(tmp_path / "b_enlace.bin")
+    os.link(paths[1], alias)
+
+    engine = fd.DedupEngine("delete")
+    engine.process_group(len(CONTENT), paths, {paths[1]: [alias]})
+
+    assert sorted(os.listdir(tmp_path)) == ["a.bin"]
+    assert engine.reclaimed_bytes == len(CONTENT)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Round-trip tests of pdf_splitter.py and pdf_merger.py. Run with: pytest
+"""
+
+import os
+
+import pytest
+
+pypdf = pytest.importorskip("pypdf")
+
+import pdf_merger  # noqa: E402
+import pdf_splitter  # noqa: E402
+
+PAGES = 5
+
+
+@pytest.fixture
+def source_pdf(tmp_path):
+    """A PDF whose page number n is recognisable by its width, 100 + n points."""
+    writer = pypdf.PdfWriter()
+    for number in range(1, PAGES + 1):
+        writer.add_blank_page(100 + number, 200)
+    path = tmp_path / "doc.pdf"
+    with open(path, "wb") as fh:
+        writer.write(fh)
+    return str(path)
+
+
+@pytest.mark.parametrize("ranges, chunk", [(None, 2), ("1,2-3,4-5", 0), ("1,2-3,4,5", 1)])
+def test_split_then_merge_keeps_page_order(tmp_path, source_pdf, ranges, chunk):
+    parts_dir = str(tmp_path / "parts")
+    pdf_splitter.pdf_splitter(source_pdf, ranges, chunk, workers=1, output_dir=parts_dir)
+
+    paths = pdf_merger.expand_inputs([os.path.join(parts_dir, "doc_page_*.pdf")])
+    merged = str(tmp_path / "merged.pdf")
+    pdf_merger.merger(merged, paths)
+
+    widths = [int(page.mediabox.width) for page in pypdf.PdfReader(merged).pages]
+    assert widths == [100 + number for number in range(1, PAGES + 1)]
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de calibración de los detectores de cambio de diapositiva de
+video_to_pdf_generator.py. Se ejecutan con: pytest
+"""
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+import video_to_pdf_generator as vg  # noqa: E402
+
+FPS = 30
+SLIDE_SECONDS = 5
+
+
+@pytest.fixture(scope="module")
+def synthetic_samples(tmp_path_factory):
+    """Una muestra por segundo del vídeo sintético: (número de diapositiva, fotograma reducido)."""
+    path = str(tmp_path_factory.mktemp("video") / "clip.mp4")
+    vg.generate_synthetic_video(path, seconds=40, fps=FPS, slide_seconds=SLIDE_SECONDS)
+    cap = cv2.VideoCapture(path)
+    samples, index = [], 0
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if index % FPS == 0:
+            samples.append((index // (FPS * SLIDE_SECONDS), vg.prepare_frame(frame)))
+        index += 1
+    cap.release()
+    return samples
+
+
+def text_slide(lines, background=255, ink=0):
+    """Diapositiva de fondo plano con texto, ya reducida como en el recorrido del vídeo."""
+    image = np.full((720, 1280, 3), background, dtype=np.uint8)
+    for row, line in enumerate(lines):
+        cv2.putText(image, line, (60, 140 + row * 90), cv2.FONT_HERSHEY_SIMPLEX, 1.6, (ink,) * 3, 3)
+    return vg.prepare_frame(image)
+
+
+def distance(a, b, detector):
+    return vg.frame_distance(vg.frame_signature(a, detector), vg.frame_signature(b, detector), detector)
+
+
+@pytest.mark.parametrize("detector", ["dhash", "phash"])
+def test_distinct_synthetic_slides_exceed_default_threshold(synthetic_samples, detector):
+    threshold = vg.DEFAULT_THRESHOLDS[detector]
+    for (prev_slide, prev), (slide, current) in zip(synthetic_samples, synthetic_samples[1:]):
+        d = distance(prev, current, detector)
+        if slide != prev_slide:
+            assert d > threshold, f"diapositivas {prev_slide + 1} y {slide + 1}: {d} bits"
+        else:
+            assert d <= threshold, f"diapositiva {slide + 1}: {d} bits sin cambio"
+
+
+@pytest.mark.parametrize("detector", ["dhash", "phash"])
+def test_distinct_white_slides_exceed_default_threshold(detector):
+    first = text_slide(["Diapositiva 1"])
+    second = text_slide(["Otro titulo largo"])
+    bullets = text_slide(["Resultados", "- dato A 45%", "- dato B 12%"])
+    threshold = vg.DEFAULT_THRESHOLDS[detector]
+    assert distance(first, second, detector) > threshold
+    assert distance(first, bullets, detector) > threshold
+
+
+@pytest.mark.parametrize("detector", ["dhash", "phash"])
+def test_hashes_ignore_sensor_noise_on_flat_slides(detector):
+    rng = np.random.default_rng(0)
+    slide = text_slide(["Introduccion", "- punto uno", "- punto dos"])
+
+    def noisy():
+        return np.clip(slide + rng.normal(0, 3, slide.shape), 0, 255).astype(np.uint8)
+
+    for _ in range(5):
+        assert distance(noisy(), noisy(), detector) <= vg.DEFAULT_THRESHOLDS[detector]
+
+
+@pytest.mark.parametrize("detector", vg.DETECTORS)
+def test_dedup_keeps_slides_with_same_template_and_different_text(detector):
+    rng = np.random.default_rng(1)
+    first = text_slide(["Resultados Q1", "- ventas", "- margen"])
+    second = text_slide(["Resultados Q2", "- ventas", "- margen"])
+    repeat = np.clip(first + rng.normal(0, 3, first.shape), 0, 255).astype(np.uint8)
+
+    index = vg.SlideIndex(16, detector)
+    index.add(first, 1)
+
+    assert index.find(second) is None
+    assert index.find(repeat) == 1
@@ -3,37 +3,941 @@ from loguru import logger # Importamos el módulo loguru para registrar logs det
 import cv2 # Importamos OpenCV para leer y procesar el archivo de video .mp4
 import os # Importamos el módulo os para trabajar con archivos en disco
 import numpy as np # Importamos numpy para el cálculo numérico y la sustracción de imágenes
-from PIL import Image # Importamos el módulo Image de Pillow para crear un único PDF final
 import sys # Importamos sys para configuración de sistema o salida
+import queue # Importamos queue para la cola acotada entre el hilo decodificador y el análisis
+import threading # Importamos threading para decodificar en un hilo separado
+from collections import Counter, deque # Importamos deque para los fotogramas en vuelo y Counter para nombres repetidos
+from concurrent.futures import ThreadPoolExecutor # Importamos el pool de hilos para análisis y escritura JPEG
+from concurrent.futures import ProcessPoolExecutor, as_completed # Importamos el pool de procesos para el modo lote
+import glob # Importamos glob para expandir patrones de vídeos en el modo lote
+import tempfile # Importamos tempfile para generar el vídeo sintético del benchmark
+import time # Importamos time para medir el rendimiento de la decodificación
+from contextlib import nullcontext # Importamos nullcontext para no medir nada cuando --stats está desactivado
+from functools import partial # Importamos partial para fijar la zona de comparación en la preparación de fotogramas
 
 # Inicializamos el logger para que registre la hora, el nivel y el mensaje
-logger.info("Configurando motor de dependencias (argparse, loguru, cv2, os, numpy, PIL).")
+logger.info("Configurando motor de dependencias (argparse, loguru, cv2, os, numpy).")
 
-# Definimos la función principal que ejecutará toda la lógica
-def main():
-    # Creamos un parser para leer argumentos de línea de comandos
-    logger.info("Instanciando ArgumentParser para procesar opciones.")
-    parser = argparse.ArgumentParser(description="Extrae frames únicos de un video MP4 y los convierte a PDF.")
-    
-    # Agregamos el argumento que exigirá la ruta del archivo MP4
-    logger.info("Añadiendo el argumento 'video' obligatorio al parser.")
-    parser.add_argument("video", help="El nombre o ruta del fichero .mp4 a procesar")
-    
-    # Parseamos los argumentos provistos por el usuario en consola
-    logger.info("Leyendo y parseando los argumentos del usuario.")
-    args = parser.parse_args()
+# Estrategias de decodificación disponibles para recorrer el vídeo (la primera es la de por defecto)
+DECODE_MODES = ("seek", "sequential")
+
+# Niveles de log admitidos por la opción --log-level
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+# Definimos la configuración del nivel de log (también se usa al arrancar cada proceso del lote)
+def configure_logging(level="INFO"):
+    """Sustituye el handler por defecto de loguru (nivel DEBUG) por uno con el nivel indicado."""
+    logger.remove()
+    logger.add(sys.stderr, level=level)
+
+# Definimos el cronómetro por etapas usado por --stats
+class StageTimer:
+    """
+    Acumula el tiempo y el número de operaciones de cada etapa del procesado.
+
+    Las etapas pueden ejecutarse en varios hilos a la vez (decodificación,
+    análisis, escritura), así que los totales son tiempo acumulado por etapa
+    y pueden superar el tiempo real transcurrido. Desactivado, stage()
+    devuelve un contexto vacío y wrap() la propia función, sin coste medible.
+    """
+
+    STAGES = ("decode", "convert", "diff", "encode", "jpg", "pdf")
+
+    class _Clock:
+        __slots__ = ("timer", "name", "start")
+
+        def __init__(self, timer, name):
+            self.timer = timer
+            self.name = name
+
+        def __enter__(self):
+            self.start = time.perf_counter()
+
+        def __exit__(self, *exc):
+            self.timer.add(self.name, time.perf_counter() - self.start)
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.totals = dict.fromkeys(self.STAGES, 0.0)
+        self.counts = dict.fromkeys(self.STAGES, 0)
+        self._lock = threading.Lock()
+        self._idle = nullcontext()
+
+    def add(self, name, seconds, count=1):
+        with self._lock:
+            self.totals[name] += seconds
+            self.counts[name] += count
+
+    def stage(self, name):
+        """Contexto que cronometra un bloque dentro de la etapa 'name'."""
+        return self._Clock(self, name) if self.enabled else self._idle
+
+    def wrap(self, name, func):
+        """Devuelve 'func' cronometrada dentro de la etapa 'name'."""
+        if not self.enabled:
+            return func
+
+        def timed(*args, **kwargs):
+            with self._Clock(self, name):
+                return func(*args, **kwargs)
+        return timed
+
+    def as_dict(self):
+        return {name: (self.totals[name], self.counts[name]) for name in self.STAGES}
+
+    @staticmethod
+    def report(stages, elapsed, frames, title):
+        """Registra la tabla de tiempos por etapa y los fotogramas por segundo."""
+        logger.info("{}: {} fotogramas decodificados en {:.2f} s ({:.1f} fotogramas/s)",
+                    title, frames, elapsed, frames / elapsed if elapsed else 0.0)
+        for name, (seconds, count) in stages.items():
+            logger.info("  {:<8} {:8.3f} s  {:7d} ops  {:8.3f} ms/op  {:5.1f} %",
+                        name, seconds, count, seconds * 1000 / count if count else 0.0,
+                        seconds * 100 / elapsed if elapsed else 0.0)
+
+# Definimos el generador que recorre el vídeo entregando solo los fotogramas muestreados
+def iter_sampled_frames(cap, frame_count, step, mode="seek", timer=None, counters=None):
+    """
+    Recorre el vídeo y devuelve un fotograma de cada 'step'.
+
+    En modo 'seek' se sitúa el cabezal con cap.set() antes de cada muestra, lo
+    que obliga a FFmpeg a volver al keyframe anterior y decodificar el GOP
+    entero. En modo 'sequential' se lee hacia delante: cap.grab() avanza los
+    fotogramas intermedios sin convertirlos a imagen y solo se llama a
+    cap.retrieve() en los fotogramas muestreados.
+
+    El modo secuencial decodifica todos los fotogramas, así que solo compensa
+    cuando el GOP del vídeo es más largo que 'step'; con GOP cortos saltar es
+    más barato. --benchmark mide ambos modos sobre un vídeo concreto.
+
+    Args:
+        cap: Objeto cv2.VideoCapture ya abierto y situado al principio.
+        frame_count (int): Número total de fotogramas del vídeo.
+        step (int): Separación en fotogramas entre dos muestras.
+        mode (str): 'sequential' o 'seek'.
+        timer (StageTimer | None): Cronómetro de la etapa 'decode' (--stats).
+        counters (dict | None): Si se indica, acumula en 'decoded' los fotogramas leídos.
+
+    Yields:
+        tuple[int, numpy.ndarray]: Índice del fotograma y su imagen BGR.
+    """
+    timer = timer or StageTimer(enabled=False)
+    reads = 0
+    # Modo heredado: un salto de cabezal por cada muestra
+    if mode == "seek":
+        current_frame = 0
+        while current_frame < frame_count:
+            with timer.stage("decode"):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, current_frame)
+                success, frame = cap.read()
+            reads += 1
+            if success:
+                yield current_frame, frame
+            current_frame += step
+        if counters is not None:
+            counters["decoded"] = counters.get("decoded", 0) + reads
+        return
+
+    # Modo secuencial: grab() en todos los fotogramas, retrieve() solo en los muestreados
+    current_frame = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    while current_frame < frame_count:
+        with timer.stage("decode"):
+            grabbed = cap.grab()
+            if grabbed and current_frame % step == 0:
+                success, frame = cap.retrieve()
+            else:
+                success = False
+        if not grabbed:
+            # Fin real del flujo (el contador de fotogramas del contenedor puede ser inexacto)
+            break
+        reads += 1
+        if success:
+            yield current_frame, frame
+        current_frame += 1
+    if counters is not None:
+        counters["decoded"] = counters.get("decoded", 0) + reads
+
+# Resolución reducida a la que se comparan los fotogramas
+COMPARE_SIZE = (160, 120)
+
+# Definimos la preparación de un fotograma para la comparación (gris + reducción)
+def prepare_frame(frame, region=None):
+    """
+    Convierte un fotograma BGR a escala de grises y lo reduce a COMPARE_SIZE.
+
+    Args:
+        frame (numpy.ndarray): Fotograma BGR a resolución completa.
+        region (CompareRegion | None): Zona de la diapositiva que se compara.
+
+    Returns:
+        numpy.ndarray: Fotograma gris reducido, listo para la comparación.
+    """
+    scaled = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), COMPARE_SIZE)
+    return region.apply(scaled) if region else scaled
+
+# Nivel de gris por debajo del cual una fila o columna del borde se considera negra
+LETTERBOX_LEVEL = 16
+
+# Definimos la lectura de un rectángulo 'x,y,ancho,alto' desde la línea de comandos
+def parse_rect(text):
+    """Convierte 'x,y,ancho,alto' (píxeles del vídeo original) en una tupla de enteros."""
+    try:
+        x, y, w, h = (int(v) for v in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"rectángulo no válido '{text}': se espera x,y,ancho,alto")
+    if x < 0 or y < 0 or w <= 0 or h <= 0:
+        raise argparse.ArgumentTypeError(f"rectángulo no válido '{text}': valores negativos o vacíos")
+    return x, y, w, h
+
+# Definimos la detección de bandas negras (letterbox/pillarbox) en un fotograma reducido
+def detect_letterbox(gray, level=LETTERBOX_LEVEL):
+    """
+    Localiza el rectángulo con contenido quitando las filas y columnas negras de los bordes.
+
+    Args:
+        gray (numpy.ndarray): Fotograma gris reducido.
+        level (int): Nivel máximo de gris que se considera negro.
+
+    Returns:
+        tuple[int, int, int, int] | None: (x0, y0, x1, y1) del contenido, o None
+            si el fotograma es completamente negro.
+    """
+    bright = gray > level
+    rows = np.flatnonzero(bright.any(axis=1))
+    cols = np.flatnonzero(bright.any(axis=0))
+    if not len(rows) or not len(cols):
+        return None
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+# Definimos la zona de comparación: recorte y regiones ignoradas sobre el fotograma reducido
+class CompareRegion:
+    """
+    Recorta el fotograma reducido a la zona de la diapositiva y anula las regiones ignoradas.
+
+    Las regiones ignoradas (webcam, reloj, barra de tareas...) se rellenan
+    con negro en todos los fotogramas, de modo que nunca aportan diferencia
+    a ningún detector. Todo se aplica a la imagen de COMPARE_SIZE, así que el
+    coste por fotograma es un recorte y una asignación con máscara.
+    """
+
+    def __init__(self, crop, ignore=()):
+        # crop e ignore en coordenadas del fotograma reducido: (x0, y0, x1, y1)
+        self.crop = crop
+        x0, y0, x1, y1 = crop
+        self.mask = None
+        for ix0, iy0, ix1, iy1 in ignore:
+            # Las regiones se trasladan al sistema de coordenadas del recorte
+            ix0, ix1 = max(ix0, x0) - x0, min(ix1, x1) - x0
+            iy0, iy1 = max(iy0, y0) - y0, min(iy1, y1) - y0
+            if ix0 < ix1 and iy0 < iy1:
+                if self.mask is None:
+                    self.mask = np.zeros((y1 - y0, x1 - x0), dtype=bool)
+                self.mask[iy0:iy1, ix0:ix1] = True
+
+    def apply(self, gray):
+        x0, y0, x1, y1 = self.crop
+        roi = gray[y0:y1, x0:x1]
+        if self.mask is not None:
+            roi = roi.copy()
+            roi[self.mask] = 0
+        return roi
+
+    @classmethod
+    def from_options(cls, frame, crop=None, ignore=(), auto_crop=False):
+        """
+        Construye la zona de comparación a partir de las opciones y del primer fotograma.
+
+        Args:
+            frame (numpy.ndarray): Primer fotograma BGR a resolución completa.
+            crop (tuple | None): Rectángulo x,y,ancho,alto en píxeles del vídeo.
+            ignore (Iterable[tuple]): Rectángulos x,y,ancho,alto a ignorar, en píxeles del vídeo.
+            auto_crop (bool): Quitar además las bandas negras detectadas.
+
+        Returns:
+            CompareRegion | None: La zona, o None si se compara el fotograma entero.
+        """
+        height, width = frame.shape[:2]
+        sx, sy = COMPARE_SIZE[0] / width, COMPARE_SIZE[1] / height
+
+        def scale(rect):
+            x, y, w, h = rect
+            return (int(x * sx), int(y * sy),
+                    min(COMPARE_SIZE[0], int(np.ceil((x + w) * sx))), min(COMPARE_SIZE[1], int(np.ceil((y + h) * sy))))
+
+        box = scale(crop) if crop else (0, 0, COMPARE_SIZE[0], COMPARE_SIZE[1])
+        if auto_crop:
+            content = detect_letterbox(prepare_frame(frame))
+            if content:
+                box = (max(box[0], content[0]), max(box[1], content[1]), min(box[2], content[2]), min(box[3], content[3]))
+        # Con menos de 8x8 píxeles de comparación el detector deja de ser fiable
+        if box[2] - box[0] < 8 or box[3] - box[1] < 8:
+            raise ValueError(f"la zona de comparación {box} es demasiado pequeña")
+        ignored = [scale(rect) for rect in ignore]
+        if box == (0, 0, COMPARE_SIZE[0], COMPARE_SIZE[1]) and not ignored:
+            return None
+        return cls(box, ignored)
+
+# Detectores de cambio de diapositiva disponibles y su umbral por defecto
+# ('absdiff' y 'mean' en nivel medio de gris 0-255; 'dhash' y 'phash' en bits distintos entre hashes)
+DETECTORS = ("absdiff", "mean", "dhash", "phash")
+DEFAULT_THRESHOLDS = {"absdiff": 12.0, "mean": 12.0, "dhash": 7, "phash": 10}
+
+# Lado de la rejilla de los hashes perceptuales: 16x16 = 256 bits (4 palabras uint64).
+# Con 8x8 = 64 bits dos diapositivas con la misma plantilla quedaban a 1-2 bits de distancia.
+HASH_SIZE = 16
+HASH_BITS = HASH_SIZE * HASH_SIZE
+
+# Zona muerta del pHash (en unidades de la DCT de la imagen de 64x64): los coeficientes
+# de menor magnitud son los del fondo plano y los que el ruido cambia de signo
+PHASH_MARGIN = 24
+
+# Rejilla del dHash (DHASH_SIZE x DHASH_SIZE celdas, 4 bits por celda = 2304 bits) y diferencia
+# mínima en niveles de gris entre celdas vecinas para que cuenten como borde y no como fondo plano
+DHASH_SIZE = 24
+DHASH_MARGIN = 10
+
+# Tabla de bits a 1 por byte, para contar bits con NumPy anteriores a bitwise_count()
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# Definimos el conteo vectorizado de bits distintos entre hashes
+def hamming(hashes, other):
+    """
+    Cuenta los bits distintos entre cada hash de 'hashes' y 'other'.
+
+    Args:
+        hashes (numpy.ndarray): Hashes uint64 con forma (..., palabras).
+        other (numpy.ndarray): Hash uint64 con forma (palabras,).
+
+    Returns:
+        numpy.ndarray: Distancia de Hamming de cada hash (forma (...)).
+    """
+    xor = np.ascontiguousarray(np.bitwise_xor(hashes, other))
+    if hasattr(np, "bitwise_count"):
+        bits = np.bitwise_count(xor)
+    else:
+        bits = _POPCOUNT8[xor.view(np.uint8)].reshape(*xor.shape, 8).sum(axis=-1)
+    return bits.sum(axis=-1)
+
+# Definimos el empaquetado de una rejilla booleana en palabras uint64
+def _pack_bits(bits):
+    return np.packbits(bits).view(">u8").astype(np.uint64)
+
+# Definimos el hash por diferencias (dHash)
+def dhash(gray):
+    """
+    Calcula el dHash: compara cada celda con su vecina derecha y con la de abajo.
+
+    Cada comparación es ternaria (más clara, más oscura o igual dentro de
+    DHASH_MARGIN) y se codifica en dos bits. Con el dHash binario clásico el
+    fondo plano de una diapositiva, que es casi toda la imagen, daba empates
+    que no distinguían dos diapositivas distintas (unos pocos bits de 256) y
+    que el ruido de cámara invertía al azar; así el fondo plano vale siempre
+    cero y la distancia la marcan los bordes del texto y las figuras.
+
+    Args:
+        gray (numpy.ndarray): Fotograma en escala de grises (p. ej. el reducido).
+
+    Returns:
+        numpy.ndarray: Hash perceptual de 4 * DHASH_SIZE**2 bits en palabras uint64.
+    """
+    small = cv2.resize(gray, (DHASH_SIZE + 1, DHASH_SIZE + 1), interpolation=cv2.INTER_AREA).astype(np.int16)
+    dx = small[:-1, 1:] - small[:-1, :-1]
+    dy = small[1:, :-1] - small[:-1, :-1]
+    return _pack_bits(np.stack([dx > DHASH_MARGIN, dx < -DHASH_MARGIN, dy > DHASH_MARGIN, dy < -DHASH_MARGIN]))
+
+# Definimos el hash perceptual por DCT (pHash)
+def phash(gray):
+    """
+    Calcula el pHash: signo de las frecuencias bajas de la DCT y brillo medio.
+
+    Cada coeficiente (salvo la componente continua) es ternario como en
+    dhash(): positivo, negativo o nulo dentro de PHASH_MARGIN, en dos bits.
+    Con el signo respecto a la mediana, los coeficientes casi nulos del fondo
+    plano cambiaban de signo con el ruido y el brillo se descartaba, de modo
+    que dos diapositivas que solo cambian de fondo y de un número quedaban a
+    2-4 bits. El brillo medio se añade en código termómetro de 256 bits: cada
+    nivel de gris de diferencia suma un bit.
+
+    Args:
+        gray (numpy.ndarray): Fotograma en escala de grises (p. ej. el reducido).
+
+    Returns:
+        numpy.ndarray: Hash perceptual de 2 * (HASH_BITS - 1) + 256 bits en palabras uint64.
+    """
+    small = cv2.resize(gray, (HASH_SIZE * 4, HASH_SIZE * 4), interpolation=cv2.INTER_AREA).astype(np.float32)
+    # La componente continua (0, 0) se sustituye por el termómetro de brillo
+    low = cv2.dct(small)[:HASH_SIZE, :HASH_SIZE].flatten()[1:]
+    brightness = np.arange(256) < round(float(small.mean()))
+    return _pack_bits(np.concatenate([low > PHASH_MARGIN, low < -PHASH_MARGIN, brightness]))
+
+# Funciones de hash perceptual por nombre de detector
+HASH_FUNCTIONS = {"dhash": dhash, "phash": phash}
+
+# Definimos la firma de un fotograma según el detector elegido
+def frame_signature(scaled, detector):
+    """Devuelve lo que compara el detector: el propio fotograma reducido o su hash perceptual."""
+    if detector in HASH_FUNCTIONS:
+        return HASH_FUNCTIONS[detector](scaled)
+    return scaled
+
+# Definimos la distancia entre dos firmas según el detector elegido
+def frame_distance(prev_sig, sig, detector):
+    """
+    Mide cuánto ha cambiado un fotograma respecto a la última diapositiva.
+
+    'absdiff' usa cv2.absdiff y cv2.mean sobre uint8 (sin conversiones a
+    float); 'mean' es el cálculo original en float32 con NumPy; 'dhash' y
+    'phash' cuentan los bits distintos entre ambos hashes.
+    """
+    if detector == "absdiff":
+        return cv2.mean(cv2.absdiff(sig, prev_sig))[0]
+    if detector == "mean":
+        return float(np.mean(np.abs(sig.astype(np.float32) - prev_sig.astype(np.float32))))
+    return int(hamming(prev_sig, sig))
+
+# Lado en píxeles de los bloques con los que se confirma una diapositiva repetida y diferencia
+# media de gris máxima en cualquiera de ellos (la compresión y el ruido de cámara quedan por debajo de 8)
+DEDUP_BLOCK = 4
+DEDUP_BLOCK_DIFF = 24
+
+# Definimos el índice de hashes perceptuales de las diapositivas ya emitidas
+class SlideIndex:
+    """
+    Guarda el pHash de cada diapositiva emitida para detectar las que reaparecen.
+
+    La búsqueda compara el hash nuevo con todos los guardados de una vez
+    (XOR + conteo de bits vectorizado), pero solo sirve de filtro: dos
+    diapositivas con la misma plantilla y un texto distinto ("Resultados Q1"
+    y "Resultados Q2") quedan a pocos bits. Cada candidato se confirma con la
+    firma y el umbral del detector activo y, como una diferencia media diluye
+    un cambio de texto pequeño, bloque a bloque sobre el fotograma reducido:
+    ningún bloque de DEDUP_BLOCK píxeles puede diferir más de DEDUP_BLOCK_DIFF.
+    Por eso se guarda el fotograma reducido de cada diapositiva (19 KB a 160x120).
+    """
+
+    def __init__(self, max_distance, detector="absdiff", threshold=None, max_block_diff=DEDUP_BLOCK_DIFF):
+        self.max_distance = max_distance
+        self.detector = detector
+        self.threshold = DEFAULT_THRESHOLDS[detector] if threshold is None else threshold
+        self.max_block_diff = max_block_diff
+        self._hashes = np.empty((64, phash(np.zeros((1, 1), dtype=np.uint8)).size), dtype=np.uint64)
+        self._frames = []
+        self._signatures = []
+        self._slides = []
+
+    @staticmethod
+    def _block_diff(prev, gray):
+        """Diferencia media de gris del bloque de DEDUP_BLOCK x DEDUP_BLOCK píxeles que más ha cambiado."""
+        diff = cv2.absdiff(prev, gray)
+        size = (max(1, diff.shape[1] // DEDUP_BLOCK), max(1, diff.shape[0] // DEDUP_BLOCK))
+        return float(cv2.resize(diff, size, interpolation=cv2.INTER_AREA).max())
+
+    def add(self, gray, slide_idx, sig=None):
+        """Registra la diapositiva 'slide_idx' a partir de su fotograma gris reducido y, si ya se calculó, su firma."""
+        count = len(self._slides)
+        if count == len(self._hashes):
+            self._hashes = np.concatenate([self._hashes, np.empty_like(self._hashes)])
+        self._hashes[count] = phash(gray)
+        self._frames.append(gray)
+        self._signatures.append(frame_signature(gray, self.detector) if sig is None else sig)
+        self._slides.append(slide_idx)
+
+    def find(self, gray, sig=None):
+        """Devuelve el número de la diapositiva equivalente ya emitida, o None."""
+        count = len(self._slides)
+        if not count:
+            return None
+        distances = hamming(self._hashes[:count], phash(gray))
+        sig = frame_signature(gray, self.detector) if sig is None else sig
+        # Se prueban los candidatos del más parecido al menos parecido
+        candidates = np.flatnonzero(distances <= self.max_distance)
+        for pos in candidates[np.argsort(distances[candidates])]:
+            if (frame_distance(self._signatures[pos], sig, self.detector) <= self.threshold
+                    and self._block_diff(self._frames[pos], gray) <= self.max_block_diff):
+                return self._slides[pos]
+        return None
+
+# Definimos la tubería productor/consumidor que prepara los fotogramas en paralelo
+def iter_prepared_frames(frames, workers=1, queue_size=16, timer=None, prepare=prepare_frame):
+    """
+    Prepara los fotogramas muestreados en paralelo conservando su orden.
+
+    Con más de un hilo, la decodificación se hace en un hilo propio que llena
+    una cola acotada, y la conversión a gris y la reducción se reparten entre
+    un pool de hilos (OpenCV libera el GIL). Los resultados se entregan en el
+    orden original porque la comparación con la última diapositiva es
+    secuencial. Con un solo hilo todo se hace en el hilo principal.
+
+    Args:
+        frames (Iterable[tuple[int, numpy.ndarray]]): Fotogramas muestreados.
+        workers (int): Número de hilos de análisis.
+        queue_size (int): Tamaño máximo de la cola de fotogramas decodificados.
+        timer (StageTimer | None): Cronómetro de la etapa 'convert' (--stats).
+        prepare (callable): Función que prepara cada fotograma (por defecto prepare_frame).
+
+    Yields:
+        tuple[int, numpy.ndarray, numpy.ndarray]: Índice, fotograma BGR y
+            fotograma preparado para la comparación.
+    """
+    prepare = timer.wrap("convert", prepare) if timer else prepare
+    # Sin paralelismo: mismo comportamiento que el bucle original
+    if workers <= 1:
+        for idx, frame in frames:
+            yield idx, frame, prepare(frame)
+        return
+
+    # El hilo decodificador deja los fotogramas en la cola y termina con un centinela
+    frame_queue = queue.Queue(maxsize=queue_size)
+    errors = []
+    stop = threading.Event()
+
+    def decoder():
+        try:
+            for item in frames:
+                if stop.is_set():
+                    break
+                frame_queue.put(item)
+        except Exception as e:  # Se propaga al hilo principal
+            errors.append(e)
+        finally:
+            frame_queue.put(None)
+
+    decoder_thread = threading.Thread(target=decoder, name="decoder", daemon=True)
+    decoder_thread.start()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis") as pool:
+            pending = deque()
+            while (item := frame_queue.get()) is not None:
+                idx, frame = item
+                pending.append((idx, frame, pool.submit(prepare, frame)))
+                # Se limita el número de fotogramas en vuelo para acotar la memoria
+                while len(pending) >= workers * 2:
+                    idx, frame, future = pending.popleft()
+                    yield idx, frame, future.result()
+            while pending:
+                idx, frame, future = pending.popleft()
+                yield idx, frame, future.result()
+    finally:
+        # Si el consumidor se detiene antes de tiempo, se libera al decodificador
+        stop.set()
+        while decoder_thread.is_alive():
+            try:
+                frame_queue.get_nowait()
+            except queue.Empty:
+                decoder_thread.join(timeout=0.1)
+    if errors:
+        raise errors[0]
+
+# Estrategias de muestreo: cada 'step' fijo o adaptativo con bisección de los cambios
+SAMPLING_MODES = ("fixed", "adaptive")
+
+# Definimos el muestreo adaptativo que solo entrega los fotogramas de las diapositivas nuevas
+def iter_adaptive_frames(cap, frame_count, first_scaled, changed, min_step, max_step, settle, counters=None,
+                         timer=None, prepare=prepare_frame):
+    """
+    Recorre el vídeo con un salto que crece mientras el contenido no cambia.
+
+    Mientras las muestras coinciden con la última diapositiva el salto se
+    duplica hasta 'max_step'. Al detectar un cambio entre dos muestras se
+    hace una búsqueda binaria entre ellas para localizar el primer fotograma
+    distinto, y desde ahí se avanza de 'settle' en 'settle' fotogramas hasta
+    que la imagen deja de cambiar (transiciones y animaciones), entregando ese
+    primer fotograma estable. Después el salto vuelve a 'min_step'.
+
+    Args:
+        cap (cv2.VideoCapture): Vídeo abierto (necesita poder posicionarse).
+        frame_count (int): Total de fotogramas del vídeo.
+        first_scaled (numpy.ndarray): Fotograma reducido de la diapositiva inicial.
+        changed (callable): changed(referencia, reducido) -> True si son diapositivas distintas.
+        min_step (int): Salto inicial en fotogramas tras cada cambio.
+        max_step (int): Salto máximo en fotogramas con el contenido estable.
+        settle (int): Separación en fotogramas para comprobar que la imagen es estable.
+        counters (dict | None): Si se indica, acumula en 'decoded' los fotogramas leídos.
+        timer (StageTimer | None): Cronómetro de las etapas 'decode' y 'convert' (--stats).
+        prepare (callable): Función que prepara cada fotograma (por defecto prepare_frame).
+
+    Yields:
+        tuple[int, numpy.ndarray, numpy.ndarray]: (índice, fotograma BGR, fotograma reducido)
+            de cada diapositiva nueva, en orden.
+    """
+    # Posición del cabezal: los saltos cortos hacia delante se leen con grab() en vez de buscar
+    head = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    reads = 0
+    timer = timer or StageTimer(enabled=False)
+    prepare = timer.wrap("convert", prepare)
+
+    def read_at(idx):
+        nonlocal head, reads
+        with timer.stage("decode"):
+            if head <= idx <= head + min_step:
+                while head < idx:
+                    cap.grab()
+                    head += 1
+                    reads += 1
+            else:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            success, frame = cap.read()
+        head = idx + 1
+        reads += 1
+        return (frame, prepare(frame)) if success else None
+
+    ref = first_scaled
+    pos = 0
+    step = min_step
+    last = frame_count - 1
+    while pos < last:
+        target = min(pos + step, last)
+        sample = read_at(target)
+        if sample is None:
+            break
+        if not changed(ref, sample[1]):
+            # Contenido estable: avanzamos y ampliamos el salto
+            pos = target
+            step = min(step * 2, max_step)
+            continue
+
+        # Búsqueda binaria del primer fotograma distinto entre 'pos' (igual) y 'target' (distinto)
+        lo, hi, hi_sample = pos, target, sample
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            mid_sample = read_at(mid)
+            if mid_sample is None:
+                break
+            if changed(ref, mid_sample[1]):
+                hi, hi_sample = mid, mid_sample
+            else:
+                lo = mid
+
+        # Avanzamos mientras la imagen siga cambiando para quedarnos con el primer fotograma estable
+        current, current_sample = hi, hi_sample
+        while current < last:
+            ahead = min(current + settle, last)
+            ahead_sample = read_at(ahead)
+            if ahead_sample is None or not changed(current_sample[1], ahead_sample[1]):
+                break
+            current, current_sample = ahead, ahead_sample
+
+        pos = current
+        step = min_step
+        # Un destello que vuelve a la diapositiva anterior no cuenta como cambio
+        if changed(ref, current_sample[1]):
+            ref = current_sample[1]
+            yield current, current_sample[0], current_sample[1]
+
+    if counters is not None:
+        counters["decoded"] = counters.get("decoded", 0) + reads
+
+# Definimos el generador del vídeo sintético usado para medir rendimiento
+def generate_synthetic_video(path, seconds=120, fps=30, size=(1280, 720), slide_seconds=10):
+    """
+    Genera un vídeo de diapositivas sintéticas (fondos y texto que cambian cada 'slide_seconds').
+
+    Args:
+        path (str): Ruta del fichero .mp4 a crear.
+        seconds (int): Duración del vídeo en segundos.
+        fps (int): Fotogramas por segundo.
+        size (tuple[int, int]): Resolución (ancho, alto).
+        slide_seconds (int): Segundos que dura cada diapositiva.
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    rng = np.random.default_rng(0)
+    for idx in range(seconds * fps):
+        slide = idx // (slide_seconds * fps)
+        if idx % (slide_seconds * fps) == 0:
+            # Nueva diapositiva: color de fondo y texto distintos
+            base = np.full((size[1], size[0], 3), rng.integers(0, 255, 3), dtype=np.uint8)
+            cv2.putText(base, f"Diapositiva {slide + 1}", (50, size[1] // 2), cv2.FONT_HERSHEY_SIMPLEX, 3,
+                        (255, 255, 255), 5)
+        frame = base.copy()
+        # Un pequeño reloj que cambia en cada fotograma, como en una grabación real
+        cv2.putText(frame, f"{idx / fps:7.2f}", (size[0] - 260, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+        writer.write(frame)
+    writer.release()
+
+# Definimos la medición comparativa de las estrategias de decodificación
+def benchmark_decoding(video_path=None, seconds=120):
+    """
+    Compara los fotogramas decodificados por segundo de los modos 'seek' y 'sequential'.
+
+    Args:
+        video_path (str | None): Vídeo a usar; si es None se genera uno sintético.
+        seconds (int): Duración del vídeo sintético en segundos.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        if video_path is None:
+            video_path = os.path.join(tmp, "benchmark.mp4")
+            logger.info(f"Generando vídeo sintético de {seconds} s en {video_path}.")
+            generate_synthetic_video(video_path, seconds=seconds)
+        for mode in DECODE_MODES:
+            cap = cv2.VideoCapture(video_path)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            step = int(fps * 2)
+            start = time.perf_counter()
+            samples = sum(1 for _ in iter_sampled_frames(cap, frame_count, step, mode))
+            elapsed = time.perf_counter() - start
+            cap.release()
+            logger.info(f"Modo {mode:<10}: {samples} muestras en {elapsed:.2f} s | "
+                        f"{frame_count / elapsed:8.1f} fotogramas de vídeo/s | {samples / elapsed:6.1f} muestras/s")
+
+# Resolución (ppp) con la que se maquetan las páginas del PDF
+PDF_RESOLUTION = 100.0
+
+# Definimos el escritor de PDF que incrusta los JPEG tal cual, página a página
+class JpegPdfWriter:
+    """
+    Escribe un PDF en streaming con una página por imagen JPEG.
+
+    Los bytes JPEG se incrustan sin decodificar (filtro /DCTDecode) y cada
+    página se vuelca al fichero nada más añadirse, de modo que la memoria no
+    depende del número de diapositivas: solo se conservan los desplazamientos
+    de los objetos para la tabla xref final. El PDF se escribe en
+    '<ruta>.part' y se renombra al cerrar, para que un PDF a medias nunca
+    parezca actualizado.
+    """
+
+    # Objetos reservados: 1 es el catálogo y 2 el árbol de páginas (se escriben al cerrar)
+    CATALOG_OBJ = 1
+    PAGES_OBJ = 2
+
+    def __init__(self, path, resolution=PDF_RESOLUTION):
+        self.path = path
+        self.resolution = resolution
+        self._tmp_path = path + ".part"
+        self._file = open(self._tmp_path, "wb")
+        self._offsets = {}
+        self._next_obj = self.PAGES_OBJ + 1
+        self._pages = []
+        # Cabecera con bytes binarios para que los lectores traten el fichero como binario
+        self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    @property
+    def page_count(self):
+        return len(self._pages)
+
+    def _write_obj(self, num, body, stream=None):
+        """Escribe el objeto 'num' con su diccionario y, opcionalmente, un stream."""
+        self._offsets[num] = self._file.tell()
+        self._file.write(f"{num} 0 obj\n".encode("ascii"))
+        self._file.write(body.encode("ascii"))
+        if stream is not None:
+            self._file.write(b"\nstream\n")
+            self._file.write(stream)
+            self._file.write(b"\nendstream")
+        self._file.write(b"\nendobj\n")
+
+    def _alloc(self):
+        num = self._next_obj
+        self._next_obj += 1
+        return num
+
+    def add_page(self, jpeg_bytes, width, height, channels=3):
+        """
+        Añade una página con la imagen JPEG a tamaño completo.
+
+        Args:
+            jpeg_bytes (bytes): Imagen ya codificada en JPEG.
+            width (int): Ancho de la imagen en píxeles.
+            height (int): Alto de la imagen en píxeles.
+            channels (int): 3 para color, 1 para escala de grises.
+        """
+        color_space = "/DeviceRGB" if channels == 3 else "/DeviceGray"
+        page_w = width * 72.0 / self.resolution
+        page_h = height * 72.0 / self.resolution
+        image_obj, content_obj, page_obj = self._alloc(), self._alloc(), self._alloc()
+        self._write_obj(
+            image_obj,
+            f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+            f"/ColorSpace {color_space} /BitsPerComponent 8 /Filter /DCTDecode /Length {len(jpeg_bytes)} >>",
+            jpeg_bytes,
+        )
+        content = f"q {page_w:.2f} 0 0 {page_h:.2f} 0 0 cm /Im0 Do Q".encode("ascii")
+        self._write_obj(content_obj, f"<< /Length {len(content)} >>", content)
+        self._write_obj(
+            page_obj,
+            f"<< /Type /Page /Parent {self.PAGES_OBJ} 0 R /MediaBox [0 0 {page_w:.2f} {page_h:.2f}] "
+            f"/Resources << /XObject << /Im0 {image_obj} 0 R >> >> /Contents {content_obj} 0 R >>",
+        )
+        self._pages.append(page_obj)
+
+    def close(self):
+        """Escribe el árbol de páginas, el catálogo y la xref, y publica el PDF."""
+        kids = " ".join(f"{num} 0 R" for num in self._pages)
+        self._write_obj(self.PAGES_OBJ, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._pages)} >>")
+        self._write_obj(self.CATALOG_OBJ, f"<< /Type /Catalog /Pages {self.PAGES_OBJ} 0 R >>")
+        xref_offset = self._file.tell()
+        lines = [f"xref\n0 {self._next_obj}\n", "0000000000 65535 f \n"]
+        lines.extend(f"{self._offsets[num]:010d} 00000 n \n" for num in range(1, self._next_obj))
+        lines.append(f"trailer\n<< /Size {self._next_obj} /Root {self.CATALOG_OBJ} 0 R >>\n")
+        lines.append(f"startxref\n{xref_offset}\n%%EOF\n")
+        self._file.write("".join(lines).encode("ascii"))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Descarta el PDF a medias."""
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+# Definimos la codificación de una diapositiva: JPEG en memoria, JPG opcional en disco y página PDF
+def emit_slide(pdf, frame, img_name=None, timer=None):
+    """
+    Codifica el fotograma en JPEG una sola vez y lo añade como página al PDF.
+
+    Args:
+        pdf (JpegPdfWriter): PDF de destino.
+        frame (numpy.ndarray): Fotograma BGR a tamaño completo.
+        img_name (str | None): Si se indica, también se guarda el JPG en disco.
+        timer (StageTimer | None): Cronómetro de las etapas 'encode', 'jpg' y 'pdf' (--stats).
+
+    Returns:
+        bool: True si la diapositiva se codificó y se añadió correctamente.
+    """
+    timer = timer or StageTimer(enabled=False)
+    with timer.stage("encode"):
+        ok, encoded = cv2.imencode(".jpg", frame)
+    if not ok:
+        return False
+    jpeg_bytes = encoded.tobytes()
+    if img_name:
+        with timer.stage("jpg"), open(img_name, "wb") as f:
+            f.write(jpeg_bytes)
+    height, width = frame.shape[:2]
+    with timer.stage("pdf"):
+        pdf.add_page(jpeg_bytes, width, height, frame.shape[2] if frame.ndim == 3 else 1)
+    return True
+
+# Extensiones de vídeo que se buscan al recibir un directorio
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mov", ".webm", ".m4v")
+
+# Definimos los nombres de salida de un lote de vídeos, sin colisiones entre ellos
+def output_names(videos):
+    """
+    Asigna a cada vídeo el nombre (sin extensión) de su salida dentro de --output-dir.
+
+    El nombre es la ruta del vídeo relativa a la raíz común de todo el lote, de
+    modo que 'cursos/a/intro.mp4' y 'cursos/b/intro.mp4' dan 'a/intro' y
+    'b/intro'; si todos los vídeos están en el mismo directorio queda solo su
+    nombre. Dos vídeos del mismo directorio que solo difieren en la extensión
+    la conservan en el nombre ('intro_mp4', 'intro_mkv').
+
+    Args:
+        videos (list[str]): Rutas de los vídeos del lote.
+
+    Returns:
+        dict[str, str]: Vídeo -> nombre relativo de su PDF y directorio de trabajo.
+    """
+    paths = {video: os.path.abspath(video) for video in videos}
+    try:
+        root = os.path.commonpath([os.path.dirname(path) for path in paths.values()]) if paths else None
+    except ValueError:
+        # Vídeos en unidades distintas (Windows): la unidad pasa a ser el primer directorio
+        root = None
+    names = {}
+    for video, path in paths.items():
+        if root is not None:
+            relative = os.path.relpath(path, root)
+        else:
+            drive, rest = os.path.splitdrive(path)
+            relative = os.path.join(drive.strip(":\\/"), rest.lstrip("\\/"))
+        names[video] = os.path.splitext(relative)[0]
+    repeated = Counter(os.path.normcase(name) for name in names.values())
+    return {
+        video: name + "_" + os.path.splitext(video)[1].lstrip(".") if repeated[os.path.normcase(name)] > 1 else name
+        for video, name in names.items()
+    }
+
+# Definimos la ruta del PDF de salida de un vídeo
+def pdf_path_for(video_path, output_dir=".", name=None):
+    """Devuelve la ruta del PDF de un vídeo: <output_dir>/<nombre>.pdf (por defecto, el nombre del vídeo)"""
+    return os.path.join(output_dir, (name or os.path.splitext(os.path.basename(video_path))[0]) + ".pdf")
+
+# Definimos el directorio de trabajo aislado de un vídeo
+def frames_dir_for(video_path, output_dir=".", name=None):
+    """Devuelve el directorio de trabajo de los JPG de un vídeo: <output_dir>/<nombre>_frames"""
+    return os.path.join(output_dir, (name or os.path.splitext(os.path.basename(video_path))[0]) + "_frames")
+
+# Definimos la expansión de los argumentos en una lista de vídeos
+def expand_video_args(items):
+    """
+    Convierte ficheros, directorios y patrones glob en una lista de vídeos.
+
+    Args:
+        items (list[str]): Argumentos de la línea de comandos.
+
+    Returns:
+        list[str]: Rutas de vídeo sin repetir, en el orden en que aparecen.
+    """
+    videos = []
+    for item in items:
+        if os.path.isdir(item):
+            # Un directorio aporta todos sus vídeos (sin recursión)
+            videos.extend(sorted(
+                os.path.join(item, name) for name in os.listdir(item)
+                if name.lower().endswith(VIDEO_EXTENSIONS)
+            ))
+        elif glob.has_magic(item):
+            # Un patrón glob admite '**' para buscar en subdirectorios
+            videos.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            videos.append(item)
+    return list(dict.fromkeys(videos))
+
+# Definimos la comprobación de si el PDF de un vídeo ya está al día
+def is_up_to_date(video_path, output_dir=".", name=None):
+    """Indica si el PDF del vídeo existe y es más reciente que el propio vídeo."""
+    pdf_path = pdf_path_for(video_path, output_dir, name)
+    try:
+        return os.path.getmtime(pdf_path) >= os.path.getmtime(video_path)
+    except OSError:
+        return False
+
+# Definimos el procesado completo de un vídeo: extracción de diapositivas y PDF
+def process_video(video_path, args, name=None):
+    """
+    Extrae las diapositivas de un vídeo y genera su PDF.
+
+    Cada diapositiva se codifica una sola vez en JPEG y se vuelca como página
+    al PDF (<output_dir>/<nombre>.pdf) en cuanto se detecta. Salvo con
+    --no-jpg, los JPG se guardan además en un directorio de trabajo propio
+    del vídeo (<output_dir>/<nombre>_frames).
+
+    Args:
+        video_path (str): Ruta del vídeo.
+        args (argparse.Namespace): Opciones de la línea de comandos.
+        name (str | None): Nombre de la salida dado por output_names(); por
+            defecto, el nombre del vídeo.
+
+    Returns:
+        dict | None: Métricas del vídeo (fotogramas, diapositivas, segundos)
+            o None si no se pudo procesar.
+    """
+    # Registramos el inicio para las métricas de rendimiento
+    logger.info(f"Procesando el vídeo: {video_path}")
+    start_time = time.perf_counter()
     
-    # Capturamos la ruta del video en una variable
-    logger.info(f"Ruta o nombre del video proveída por parámetro: {args.video}")
-    video_path = args.video
+    # Cronómetro por etapas (solo mide con --stats)
+    timer = StageTimer(enabled=args.stats)
     
     # Comprobamos si el fichero suministrado existe realmente en el disco
     logger.info(f"Comprobando si existe el fichero: {video_path}")
     if not os.path.exists(video_path):
         # Registramos un error si no lo encontramos
-        logger.error("El fichero de video especificado no existe. Abortando ejecución.")
-        # Salimos del programa devolviendo un código de error
-        sys.exit(1)
+        logger.error(f"El fichero de video especificado no existe: {video_path}")
+        # Devolvemos None para que el llamante registre el fallo
+        return None
         
     # Inicializamos la utilidad VideoCapture de OpenCV pasándole el archivo
     logger.info("Iniciando la lectura del archivo de video usando cv2.VideoCapture().")
@@ -59,161 +963,368 @@ def main():
     
     # Leemos obligatoriamente el primer fotograma del vídeo para usarlo de referencia inicial
     logger.info("Intentando extraer el primer fotograma absoluto (frame 0) del video.")
-    success, frame = cap.read()
+    with timer.stage("decode"):
+        success, frame = cap.read()
     
     # Comprobamos si la lectura del primer fotograma falló
     logger.info("Comprobando si la lectura del primer fotograma fue exitosa ('success').")
     if not success:
         # Generamos un error en loguru si falla la lectura del video
-        logger.error("No se pudo leer ningún fotograma del archivo MP4 suministrado.")
-        # Finalizamos la ejecución forzosamente
-        sys.exit(1)
+        logger.error(f"No se pudo leer ningún fotograma del archivo suministrado: {video_path}")
+        # Liberamos el vídeo y devolvemos None para que el llamante registre el fallo
+        cap.release()
+        return None
         
+    # Delimitamos la zona que se compara: recorte, bandas negras y regiones ignoradas
+    try:
+        region = CompareRegion.from_options(frame, args.crop, args.ignore or (), args.auto_crop)
+    except ValueError as e:
+        logger.error(f"Zona de comparación no válida para '{video_path}': {e}")
+        cap.release()
+        return None
+    if region:
+        logger.info(f"Comparando solo la zona {region.crop} del fotograma reducido"
+                    f"{' con regiones ignoradas' if region.mask is not None else ''}.")
+    prepare = partial(prepare_frame, region=region)
+    
+    # Creamos el directorio de trabajo propio de este vídeo salvo que no se quieran los JPG intermedios
+    work_dir = None if args.no_jpg else frames_dir_for(video_path, args.output_dir, name)
+    if work_dir:
+        logger.info(f"Usando el directorio de trabajo aislado '{work_dir}' para los JPG.")
+        os.makedirs(work_dir, exist_ok=True)
+    
+    # Abrimos el PDF de salida: las páginas se escriben a medida que se detectan
+    output_pdf_name = pdf_path_for(video_path, args.output_dir, name)
+    os.makedirs(os.path.dirname(output_pdf_name) or ".", exist_ok=True)
+    logger.info(f"Abriendo el PDF '{output_pdf_name}' para escribir las páginas en streaming.")
+    pdf = JpegPdfWriter(output_pdf_name)
+    
     # Configuramos nuestro contador para las imágenes JPG que irán generándose (empezamos por 1)
     logger.info("Iniciando variable 'image_idx' en 1 para nombrar el primer JPG.")
     image_idx = 1
     
     # Nombramos la ruta que va a tener nuestra primera imagen generada
     logger.info("Generando string con el nombre del archivo JPG (001.jpg).")
-    img_name = f"{image_idx:03d}.jpg"
+    img_name = os.path.join(work_dir, f"{image_idx:03d}.jpg") if work_dir else None
     
-    # Escribimos el primer fotograma en disco obligatoriamente (es la primera diapositiva)
-    logger.info(f"Guardando la primera diapositiva en el disco como {img_name}.")
-    cv2.imwrite(img_name, frame)
+    # Codificamos el primer fotograma como primera página (y JPG en disco si procede)
+    logger.info(f"Añadiendo la primera diapositiva al PDF{f' y al disco como {img_name}' if img_name else ''}.")
+    if not emit_slide(pdf, frame, img_name, timer):
+        logger.error("No se pudo codificar la primera diapositiva.")
     
-    # Creamos una lista para ir almacenando los nombres de todos los archivos JPG guardados
-    logger.info("Creando lista 'jpg_list' vacía para registrar las imágenes guardadas.")
-    jpg_list = []
+    # Convertimos el fotograma a escala de grises y lo reducimos (160x120) para comparar más rápido
+    logger.info("Convirtiendo primer frame a Escala de Grises y redimensionando a resolución muy baja (160x120).")
+    prev_frame = prepare(frame)
     
-    # Añadimos el primer frame a nuestra lista de recolección de JPG
-    logger.info("Añadiendo el primer JPG a nuestra lista de seguimiento de archivos finales.")
-    jpg_list.append(img_name)
+    # Calculamos la firma de la primera diapositiva según el detector elegido
+    detector = args.detector
+    logger.info(f"Usando el detector de cambios '{detector}'.")
+    prev_sig = frame_signature(prev_frame, detector)
     
-    # Convertimos el fotograma de BGR a Escala de Grises para comparación mas rápida
-    logger.info("Convirtiendo primer frame a Escala de Grises (COLOR_BGR2GRAY) para cálculo eficiente.")
-    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    # Establecemos el umbral que determina si la diapositiva ha cambiado significativamente
+    threshold = args.threshold if args.threshold is not None else DEFAULT_THRESHOLDS[detector]
+    logger.info(f"Definiendo umbral de cambio del detector '{detector}' a {threshold}.")
     
-    # Redimensionamos la imagen en gris para que comparar el contenido no consuma mucha memoria (160x120)
-    logger.info("Redimensionando frame gris a resolución muy baja (160x120) para mayor velocidad de resta.")
-    prev_frame = cv2.resize(gray_frame, (160, 120))
-    
-    # Establecemos nuestro umbral numérico empírico que determina si la diapositiva ha cambiado significativamente
-    logger.info("Definiendo umbral de diferencia de píxeles a valor 12.0 (slider threshold).")
-    threshold = 12.0
+    # Con --dedup guardamos el pHash de cada diapositiva emitida para no repetir las que reaparecen
+    slide_index = SlideIndex(args.dedup_distance, detector, threshold) if args.dedup else None
+    if slide_index:
+        logger.info(f"Activando la deduplicación de diapositivas repetidas (distancia pHash <= {args.dedup_distance}).")
+        slide_index.add(prev_frame, image_idx, prev_sig)
+    skipped_repeats = 0
     
     # Establecemos el salto de frames por iteración a la cantidad de FPS (evaluamos 1 vez cada 2 segundos aprox.)
     logger.info("Calculando el salto temporal 'step' multiplicando FPS x 2 (analisis de fotogramas espaciados).")
     step = int(fps * 2) 
     
-    # Definimos nuestra variable de fotograma actual, donde reiniciamos en nuestro cursor = 0
-    logger.info("Seteando cursor de iteración 'current_frame' a 0 para el bucle.")
-    current_frame = 0
+    # Función de cambio compartida con el muestreo adaptativo
+    def changed(reference, scaled):
+        return frame_distance(frame_signature(reference, detector), frame_signature(scaled, detector), detector) > threshold
+    changed = timer.wrap("diff", changed)
+    # Fotogramas leídos del vídeo, contando el primero, que ya se leyó
+    counters = {"decoded": 1}
     
-    # Iniciamos el bucle condicional para recorrer todo el video, saltando fotogramas según paso
-    logger.info("Empezando el bucle de procesamiento 'while current_frame < frame_count'.")
-    while current_frame < frame_count:
-        # Le indicamos al motor de OpenCV que salte al fotograma indicado
-        logger.info(f"Situando cabezal virtual de video en el fotograma exacto N.º {current_frame}.")
-        cap.set(cv2.CAP_PROP_POS_FRAMES, current_frame)
-        
-        # Leemos los datos de ese fotograma explícito
-        logger.info(f"Leyendo efectivamente fotograma de la posición {current_frame}.")
-        success, frame = cap.read()
-        
-        # Comparamos fallos de buffer
-        logger.info("Verificando variable de exito 'success' de este buffer.")
-        if not success:
-            # Adelantamos si el salto rebasó la linea o fue corrupto
-            logger.info("Fallo en la lectura de buffer actual. Saltando internamente.")
-            current_frame += step
-            # Reiniciamos vuelta algorítmica
-            logger.info("Disparando comando 'continue' al bucle del parser de frame.")
-            continue
-            
-        # Convertimos fotograma iterativo a matriz simple en blanco y negro
-        logger.info("Transformando iteración visual a cv2.COLOR_BGR2GRAY.")
-        gray_iter = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # Reducción matricial
-        logger.info("Ejecutando resizing a (160, 120) a la nueva captura base en escala de grises.")
-        scaled_iter = cv2.resize(gray_iter, (160, 120))
-        
-        # Cálculo de tensor delta con medias absolutas float de np
-        logger.info("Sumando diferencia np.mean(np.abs(anterior - iteracion)) para buscar el delta computacional.")
-        diff = np.mean(np.abs(scaled_iter.astype(np.float32) - prev_frame.astype(np.float32)))
-        
-        # Comparamos magnitud del del delta 
-        logger.info(f"Validando si varianza obtenida ({diff:.2f}) es abismal (> umbral de {threshold:.2f}).")
-        if diff > threshold:
-            # Nuevo Slide detectado
-            logger.info(f"¡Cambio fuerte en la escena detectado! Incrementando variable global 'image_idx' = {image_idx + 1}.")
-            image_idx += 1
-            
-            # Interpolación String a 00N
-            logger.info("Estableciendo template string de enumeración paddeada a 3 ceros de la nueva vista.")
-            img_name = f"{image_idx:03d}.jpg"
-            
-            # Exportación cruda disco
-            logger.info(f"Forzando persistencia CV2 a disco rígido por invocación cv2.imwrite() sobre: {img_name}.")
-            cv2.imwrite(img_name, frame)
-            
-            # Anexión en variable matriz final
-            logger.info(f"Apelando append() de {img_name} sobre nuestra estructura maestra de arrays.")
-            jpg_list.append(img_name)
-            
-            # Refresco de referencia comparativa
-            logger.info("Desplazando 'prev_frame' a este estado 'scaled_iter' para servir de faro a los proximos escaneos de tiempo.")
-            prev_frame = scaled_iter
+    # Con varios hilos, la codificación JPEG y la escritura del PDF se hacen en un hilo aparte para no bloquear el bucle
+    workers = max(1, args.workers)
+    logger.info(f"Preparando la tubería de análisis con {workers} hilo(s).")
+    jpeg_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jpeg") if workers > 1 else None
+    pending_writes = deque()
+    
+    try:
+        if args.sampling == "adaptive":
+            # Muestreo adaptativo: solo llegan los primeros fotogramas estables de cada diapositiva nueva
+            min_step = max(1, int(fps * args.min_step))
+            max_step = max(min_step, int(fps * args.max_step))
+            logger.info(f"Empezando el recorrido adaptativo del vídeo con saltos de {min_step} a {max_step} fotogramas.")
+            prepared = iter_adaptive_frames(cap, frame_count, prev_frame, changed, min_step, max_step,
+                                            max(1, int(fps / 2)), counters, timer, prepare)
+        else:
+            # Recorremos el vídeo con la estrategia elegida, recibiendo solo los fotogramas muestreados
+            logger.info(f"Empezando el recorrido del vídeo en modo '{args.decode}' con un salto de {step} fotogramas.")
+            # El primer fotograma ya se leyó: en modo secuencial el cabezal está en el fotograma 1
+            sampled = iter_sampled_frames(cap, frame_count, step, args.decode, timer, counters)
+            # Los fotogramas llegan ya en gris y reducidos, en su orden original
+            prepared = iter_prepared_frames(sampled, workers, timer=timer, prepare=prepare)
+        # Los mensajes por fotograma son DEBUG con formato diferido: si el nivel está
+        # desactivado, loguru descarta la llamada sin construir el texto
+        for current_frame, frame, scaled_iter in prepared:
+            # Calculamos la firma del fotograma y su distancia a la última diapositiva
+            with timer.stage("diff"):
+                sig = frame_signature(scaled_iter, detector)
+                diff = frame_distance(prev_sig, sig, detector)
+            logger.debug("Fotograma {}: distancia '{}' {:.2f} (umbral {:.2f}).", current_frame, detector, diff, threshold)
             
-        # Refrescamos bucle temporal 1 iteración real vs la de OpenCV
-        logger.info(f"Agregando a 'current_frame' ({current_frame}) el coeficiente métrico de salto ({step}).")
-        current_frame += step
+            # Comparamos magnitud del del delta 
+            if diff > threshold:
+                # Si la diapositiva ya salió antes en el vídeo, no la repetimos en el PDF
+                if slide_index:
+                    with timer.stage("diff"):
+                        repeated = slide_index.find(scaled_iter, sig)
+                    if repeated is not None:
+                        logger.debug("El fotograma {} repite la diapositiva {}; no se añade de nuevo.", current_frame, repeated)
+                        skipped_repeats += 1
+                        prev_frame, prev_sig = scaled_iter, sig
+                        continue
+                
+                # Nuevo Slide detectado
+                image_idx += 1
+                logger.debug("Nueva diapositiva {} en el fotograma {}.", image_idx, current_frame)
+                
+                # Interpolación String a 00N
+                img_name = os.path.join(work_dir, f"{image_idx:03d}.jpg") if work_dir else None
+                
+                # Codificación única a JPEG y volcado de la página (en el hilo de escritura si la tubería está activa)
+                if jpeg_writer:
+                    pending_writes.append((image_idx, jpeg_writer.submit(emit_slide, pdf, frame, img_name, timer)))
+                    # Revisamos las escrituras ya terminadas para no acumular fotogramas en memoria
+                    while pending_writes and pending_writes[0][1].done():
+                        done_idx, future = pending_writes.popleft()
+                        if not future.result():
+                            logger.error(f"No se pudo codificar la diapositiva {done_idx}.")
+                elif not emit_slide(pdf, frame, img_name, timer):
+                    logger.error(f"No se pudo codificar la diapositiva {image_idx}.")
+                
+                # Refresco de referencia comparativa
+                prev_frame, prev_sig = scaled_iter, sig
+                if slide_index:
+                    with timer.stage("diff"):
+                        slide_index.add(scaled_iter, image_idx, sig)
 
+        # Esperamos a que el hilo de escritura termine todas las páginas pendientes
+        if jpeg_writer:
+            logger.info(f"Esperando a que se escriban {len(pending_writes)} páginas pendientes.")
+            jpeg_writer.shutdown(wait=True)
+            for done_idx, future in pending_writes:
+                if not future.result():
+                    logger.error(f"No se pudo codificar la diapositiva {done_idx}.")
+    except BaseException:
+        # Ante cualquier fallo descartamos el PDF a medias
+        if jpeg_writer:
+            jpeg_writer.shutdown(wait=True, cancel_futures=True)
+        pdf.abort()
+        cap.release()
+        raise
+    
+    # Fotogramas leídos realmente para las métricas (con saltos, la posición del
+    # cabezal no dice cuántos se han decodificado)
+    frames_decoded = counters["decoded"]
+    logger.info(f"Fotogramas decodificados: {frames_decoded} de {frame_count}.")
+    
     # Ya escaneado, soltamos control de archivo
     logger.info("Cerrando proceso nativo mp4 y liberando handlers de archivo en OS del host con 'release()'.")
     cap.release()
     
-    # Verificamos si logramos un resultado real
-    logger.info(f"Recuento final de capturas obtenidas evaluando len() de lista nativa: total de {len(jpg_list)} items.")
-    if not jpg_list:
-        # Saliendo y registrando empty log
-        logger.warning("No hubo imágenes significativas para formar el documento. Terminado vacío.")
-        return
-        
-    # Agrupamos PIL
-    logger.info("Definiendo estructura abstracta 'images_to_pdf' de Python nativo lista[].")
-    images_to_pdf = []
-    
-    # Loop convertidor JPG
-    logger.info("Empezando el for-loop para reconversión a PDF PIL.")
-    for file_path in jpg_list:
-        # Instancia unitaria
-        logger.info(f"Ejecutando asignación virtual Image.open() local sobre: {file_path}.")
-        img = Image.open(file_path)
-        
-        # Limpieza RGB
-        logger.info(f"Re-mapeando modo de coloración de buffer a 'RGB' (canal Alpha nulo) del recurso fotográfico {file_path}.")
-        img_rgb = img.convert('RGB')
-        
-        # Carga en vector de memoria
-        logger.info("Enlistando instancia procesada 'img_rgb' adentro del stack de memoria de conversion hacia PDF.")
-        images_to_pdf.append(img_rgb)
-        
-    # Bautizando PDF final con el mismo nombre y .pdf
-    logger.info("Configurando el nombre de salida basado en el valor OS os.path.splitext() restándole extensión final '.mp4' y asignando '.pdf'.")
-    output_pdf_name = os.path.splitext(os.path.basename(video_path))[0] + ".pdf"
-    
-    # Volcado multi paginado
-    logger.info(f"Desencadenando protocolo 'save_all=True' desde images_to_pdf[0] y apuntando hacia el output de nombre '{output_pdf_name}'.")
-    images_to_pdf[0].save(
-        output_pdf_name,
-        save_all=True,
-        append_images=images_to_pdf[1:],
-        resolution=100.0
-    )
+    # Cerramos el PDF: árbol de páginas, tabla xref y renombrado al nombre definitivo
+    logger.info(f"Cerrando el PDF con {pdf.page_count} páginas y publicándolo como '{output_pdf_name}'.")
+    with timer.stage("pdf"):
+        pdf.close()
+    
+    # Informamos de las diapositivas repetidas que no se han vuelto a añadir
+    if skipped_repeats:
+        logger.info(f"Se omitieron {skipped_repeats} reapariciones de diapositivas ya incluidas.")
     
     # Emisión final exitosa en la pantalla
-    logger.info(f"[PROCESO TERMINADO CON EXITO]: Creado el consolidado multi-documento con un total de {len(jpg_list)} páginas y nombre '{output_pdf_name}'.")
+    logger.info(f"[PROCESO TERMINADO CON EXITO]: Creado el consolidado multi-documento con un total de {pdf.page_count} páginas y nombre '{output_pdf_name}'.")
+    
+    # Métricas del vídeo, con el desglose por etapas si se pidió --stats
+    elapsed = time.perf_counter() - start_time
+    if args.stats:
+        StageTimer.report(timer.as_dict(), elapsed, frames_decoded, f"[ESTADÍSTICAS] {os.path.basename(video_path)}")
+    return {
+        "video": video_path,
+        "frames": frames_decoded,
+        "slides": pdf.page_count,
+        "seconds": elapsed,
+        "stages": timer.as_dict() if args.stats else None,
+    }
+
+# Definimos la función principal que ejecutará toda la lógica
+def main():
+    # Creamos un parser para leer argumentos de línea de comandos
+    logger.info("Instanciando ArgumentParser para procesar opciones.")
+    parser = argparse.ArgumentParser(description="Extrae frames únicos de un video MP4 y los convierte a PDF.")
+    
+    # Agregamos el argumento con los vídeos: ficheros, directorios o patrones glob
+    logger.info("Añadiendo el argumento 'videos' (ficheros, directorios o patrones glob) al parser.")
+    parser.add_argument("videos", nargs="*",
+                        help="Ficheros de vídeo, directorios o patrones glob (p. ej. 'cursos/**/*.mp4') a procesar")
+    
+    # Agregamos la estrategia de decodificación (salto por defecto; la secuencial compensa con GOP largos)
+    logger.info("Añadiendo la opción '--decode' para elegir la estrategia de decodificación.")
+    parser.add_argument("--decode", choices=DECODE_MODES, default=DECODE_MODES[0],
+                        help="'seek' salta con cap.set() a cada muestra (por defecto); 'sequential' lee hacia delante "
+                             "con grab()/retrieve(), más rápido si el GOP es mayor que el salto (ver --benchmark)")
+    
+    # Agregamos el modo de medición de rendimiento
+    logger.info("Añadiendo la opción '--benchmark' para comparar las estrategias de decodificación.")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compara ambas estrategias sobre el vídeo indicado o uno sintético y sale")
+    
+    # Agregamos la estrategia de muestreo
+    logger.info("Añadiendo las opciones '--sampling', '--min-step' y '--max-step' del muestreo.")
+    parser.add_argument("--sampling", choices=SAMPLING_MODES, default="fixed",
+                        help="'fixed' analiza un fotograma cada 2 s; 'adaptive' alarga el salto mientras no hay cambios "
+                             "y busca por bisección el primer fotograma estable de cada diapositiva")
+    parser.add_argument("--min-step", type=float, default=1.0,
+                        help="Salto inicial en segundos del muestreo adaptativo tras cada cambio (por defecto: 1)")
+    parser.add_argument("--max-step", type=float, default=16.0,
+                        help="Salto máximo en segundos del muestreo adaptativo (por defecto: 16)")
+    
+    # Agregamos el detector de cambios de diapositiva
+    logger.info("Añadiendo la opción '--detector' para elegir cómo se comparan los fotogramas.")
+    parser.add_argument("--detector", choices=DETECTORS, default="absdiff",
+                        help="'absdiff' diferencia media entera con OpenCV (por defecto); 'mean' cálculo float32 original; "
+                             "'dhash'/'phash' bits distintos entre hashes perceptuales")
+    
+    # Agregamos el umbral del detector
+    logger.info("Añadiendo la opción '--threshold' para ajustar la sensibilidad del detector.")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Umbral de cambio (por defecto: 12 para absdiff/mean; 7 bits de 2304 para dhash y 10 de 766 para phash)")
+    
+    # Agregamos la zona de comparación: recorte, bandas negras y regiones ignoradas
+    logger.info("Añadiendo las opciones '--crop', '--auto-crop' e '--ignore' para limitar la zona comparada.")
+    parser.add_argument("--crop", type=parse_rect, metavar="X,Y,ANCHO,ALTO",
+                        help="Compara solo este rectángulo (píxeles del vídeo original), p. ej. la zona de la diapositiva")
+    parser.add_argument("--auto-crop", action="store_true",
+                        help="Detecta en el primer fotograma las bandas negras (letterbox) y las excluye de la comparación")
+    parser.add_argument("--ignore", type=parse_rect, action="append", metavar="X,Y,ANCHO,ALTO",
+                        help="Región que no cuenta en la comparación (webcam, reloj, cursor...); se puede repetir")
+    
+    # Agregamos la deduplicación de diapositivas que reaparecen
+    logger.info("Añadiendo la opción '--dedup' para no repetir diapositivas que vuelven a aparecer.")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Omite las diapositivas que repiten una ya incluida en el PDF (mismo pHash, detector y contenido "
+                             "bloque a bloque); lo que cambia solo, como un reloj o la webcam, debe excluirse con --ignore")
+    parser.add_argument("--dedup-distance", type=int, default=16,
+                        help="Bits distintos del pHash (de 766) hasta los que dos diapositivas se consideran la misma (por defecto: 16)")
+    
+    # Agregamos el número de hilos de la tubería decodificación/análisis/escritura
+    logger.info("Añadiendo la opción '--workers' para el análisis en paralelo de fotogramas.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Hilos de análisis; con más de 1 se decodifica, analiza y escribe JPEG en paralelo (por defecto: 1)")
+    
+    # Agregamos el número de procesos del modo lote
+    logger.info("Añadiendo la opción '--jobs' para procesar varios vídeos en paralelo.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Vídeos procesados a la vez en procesos separados (por defecto: 1)")
+    
+    # Agregamos el directorio de salida de PDFs y directorios de trabajo
+    logger.info("Añadiendo la opción '--output-dir' para los PDF y los directorios de trabajo.")
+    parser.add_argument("--output-dir", default=".",
+                        help="Directorio donde se crean <vídeo>.pdf y <vídeo>_frames/, con la ruta relativa a la raíz "
+                             "común del lote si hay vídeos con el mismo nombre en otros directorios (por defecto: '.')")
+    
+    # Agregamos la opción para no dejar los JPG intermedios en disco
+    logger.info("Añadiendo la opción '--no-jpg' para generar solo el PDF.")
+    parser.add_argument("--no-jpg", action="store_true",
+                        help="No guarda las diapositivas como JPG: se incrustan directamente en el PDF")
+    
+    # Agregamos las opciones de diagnóstico: nivel de log y tiempos por etapa
+    logger.info("Añadiendo las opciones '--log-level' y '--stats'.")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="INFO",
+                        help="Nivel de log; los mensajes por fotograma solo se muestran con DEBUG (por defecto: INFO)")
+    parser.add_argument("--stats", action="store_true",
+                        help="Muestra al final el tiempo por etapa (decode, convert, diff, encode, jpg, pdf) y los fotogramas/s")
+    
+    # Agregamos la opción para regenerar PDFs ya al día
+    logger.info("Añadiendo la opción '--force' para regenerar los PDF ya actualizados.")
+    parser.add_argument("--force", action="store_true",
+                        help="En lotes de varios vídeos, procesa también los que tienen un PDF más reciente que el vídeo "
+                             "(un único vídeo se procesa siempre)")
+    
+    # Parseamos los argumentos provistos por el usuario en consola
+    logger.info("Leyendo y parseando los argumentos del usuario.")
+    args = parser.parse_args()
+    configure_logging(args.log_level)
+    
+    # En modo benchmark no se genera PDF
+    if args.benchmark:
+        logger.info("Ejecutando la comparativa de estrategias de decodificación.")
+        benchmark_decoding(args.videos[0] if args.videos else None)
+        return
+    
+    # Sin benchmark al menos un vídeo es obligatorio
+    if not args.videos:
+        parser.error("Es necesario indicar al menos un fichero de vídeo, directorio o patrón a procesar.")
+    
+    # Expandimos directorios y patrones a la lista final de vídeos
+    logger.info(f"Expandiendo los argumentos de entrada: {args.videos}")
+    videos = expand_video_args(args.videos)
+    os.makedirs(args.output_dir, exist_ok=True)
+    
+    # Cada vídeo recibe un nombre de salida propio aunque varios se llamen igual en directorios distintos
+    names = output_names(videos)
+    
+    # En un lote descartamos los vídeos cuyo PDF ya está al día; un único vídeo se regenera siempre
+    skip_current = len(videos) > 1 and not args.force
+    pending = [v for v in videos if not (skip_current and is_up_to_date(v, args.output_dir, names[v]))]
+    for skipped in sorted(set(videos) - set(pending)):
+        logger.info(f"Saltando '{skipped}': su PDF ya está actualizado (use --force para regenerarlo).")
+    
+    # Procesamos los vídeos, en un pool de procesos si se pidió más de un trabajo
+    batch_start = time.perf_counter()
+    results = []
+    jobs = max(1, min(args.jobs, len(pending))) if pending else 1
+    logger.info(f"Procesando {len(pending)} vídeo(s) con {jobs} proceso(s).")
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=configure_logging, initargs=(args.log_level,)) as pool:
+            futures = {pool.submit(process_video, video, args, names[video]): video for video in pending}
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.error(f"Error procesando '{futures[future]}': {e}")
+                    results.append(None)
+    else:
+        # Un vídeo con error no detiene el resto del lote, igual que en el pool de procesos
+        for video in pending:
+            try:
+                results.append(process_video(video, args, names[video]))
+            except Exception as e:
+                logger.error(f"Error procesando '{video}': {e}")
+                results.append(None)
+    elapsed = time.perf_counter() - batch_start
+    
+    # Resumen agregado de rendimiento cuando se procesan varios vídeos
+    done = [r for r in results if r]
+    failed = len(results) - len(done)
+    if len(videos) > 1:
+        frames = sum(r["frames"] for r in done)
+        slides = sum(r["slides"] for r in done)
+        logger.info(
+            f"[RESUMEN LOTE]: {len(done)} procesados, {len(videos) - len(pending)} al día, {failed} con error | "
+            f"{slides} diapositivas | {elapsed:.1f} s | "
+            f"{len(done) / elapsed * 3600 if elapsed else 0:.1f} vídeos/hora | "
+            f"{frames / elapsed if elapsed else 0:.1f} fotogramas decodificados/s"
+        )
+        # Con --stats sumamos también los tiempos por etapa de todos los vídeos
+        if args.stats and done:
+            stages = {name: (sum(r["stages"][name][0] for r in done), sum(r["stages"][name][1] for r in done))
+                      for name in StageTimer.STAGES}
+            StageTimer.report(stages, elapsed, frames, "[ESTADÍSTICAS LOTE]")
+    
+    # Salimos con código de error si algún vídeo falló
+    if failed:
+        sys.exit(1)
 
 # Bloque default arranque scripts Python Main
 logger.info("Verificando protocolo de punto de entrada (__name__ == '__main__').")